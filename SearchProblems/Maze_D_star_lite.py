@@ -0,0 +1,136 @@
+# D* Lite incremental replanning on the Maze.py grid model.
+#
+# The search runs backwards from the goal cells towards the start and keeps, for every cell it touched, g (the
+# distance it has settled on) and rhs (the one-step lookahead from the neighbours' g values). When walls are
+# added or removed only the cells around the edit become inconsistent (g != rhs), and only those, plus what
+# their changes ripple into, are expanded again. A small edit therefore costs a small fraction of a new search.
+
+import heapq
+
+from Maze import dirs
+from Search_stats import instrumented
+
+INF = float('inf')
+
+
+class DStarLite:
+    def __init__(self, grid, start):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.start = start
+        self.km = 0  # Key modifier, grows by how far the start moved since the keys were computed
+        self.g = {}
+        self.rhs = {}
+        self.queue = []  # Heap of (key, cell), entries whose key differs from queued[cell] are stale
+        self.queued = {}
+        for i in range(self.rows):
+            for j in range(self.cols):
+                if grid[i][j] == 'G':
+                    self.rhs[(i, j)] = 0
+                    self.push((i, j))
+
+    def isOpen(self, cell):
+        i, j = cell
+        return 0 <= i < self.rows and 0 <= j < self.cols and self.grid[i][j] != 'W'
+
+    def neighbours(self, cell):
+        i, j = cell
+        return [(i + di, j + dj) for di, dj in dirs if self.isOpen((i + di, j + dj))]
+
+    def heuristic(self, cell):
+        return abs(cell[0] - self.start[0]) + abs(cell[1] - self.start[1])
+
+    def key(self, cell):
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return best + self.heuristic(cell) + self.km, best
+
+    def push(self, cell):
+        key = self.key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.queue, (key, cell))
+
+    def top(self):
+        while self.queue and self.queued.get(self.queue[0][1]) != self.queue[0][0]:
+            heapq.heappop(self.queue)  # Drop stale entries (lazy removal)
+        return self.queue[0] if self.queue else ((INF, INF), None)
+
+    def updateCell(self, cell):
+        if self.grid[cell[0]][cell[1]] != 'G':
+            if self.isOpen(cell):
+                self.rhs[cell] = min((1 + self.g.get(n, INF) for n in self.neighbours(cell)), default=INF)
+            else:
+                self.rhs[cell] = INF
+        self.queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            self.push(cell)
+
+    def plan(self, stats=None):
+        start = self.start
+        while True:
+            key, cell = self.top()
+            if key >= self.key(start) and self.rhs.get(start, INF) == self.g.get(start, INF):
+                break
+            newKey = self.key(cell)
+            if key < newKey:  # Key out of date since the start moved, queue it again
+                self.push(cell)
+                continue
+            heapq.heappop(self.queue)
+            del self.queued[cell]
+            neighbours = self.neighbours(cell)
+            if self.g.get(cell, INF) > self.rhs.get(cell, INF):  # Overconsistent: settle it
+                self.g[cell] = self.rhs[cell]
+                for n in neighbours:
+                    self.updateCell(n)
+            else:  # Underconsistent: a wall made it worse, reopen it and everything that relied on it
+                self.g[cell] = INF
+                self.updateCell(cell)
+                for n in neighbours:
+                    self.updateCell(n)
+            if stats:
+                stats.expanded += 1
+                stats.generated += len(neighbours)
+                stats.frontier(len(self.queued))
+
+    @instrumented
+    def path(self, stats=None):
+        # Shortest path from the start to the nearest goal, [] if there is none. stats counts the cells this
+        # replanning expanded, which after a small edit are far fewer than a new search would take
+        self.plan(stats)
+        cell = self.start
+        if self.g.get(cell, INF) == INF:
+            return []
+        path = [cell]
+        while self.grid[cell[0]][cell[1]] != 'G':
+            cell = min(self.neighbours(cell), key=lambda n: self.g.get(n, INF))
+            path.append(cell)
+        return path
+
+    def moveStart(self, cell):
+        self.km += self.heuristic(cell)  # Distance between the old and the new start
+        self.start = cell
+
+    def update(self, edits):
+        # edits: list of ((i, j), value) with value 'W', ' ' or 'G'; repairs only what the edits affect
+        for (i, j), value in edits:
+            self.grid[i][j] = value
+            if value == 'G':
+                self.rhs[(i, j)] = 0
+        for (i, j), value in edits:
+            for cell in [(i, j)] + [(i + di, j + dj) for di, dj in dirs]:
+                if 0 <= cell[0] < self.rows and 0 <= cell[1] < self.cols:
+                    self.updateCell(cell)
+
+
+if __name__ == "__main__":
+    from Maze import maze
+    from Search_stats import SearchStats
+
+    grid = [row[:] for row in maze]
+    planner = DStarLite(grid, (4, 0))
+    stats = SearchStats(traceMemory=False)
+    print("Path:", planner.path(stats=stats), "expanded", stats.expanded)
+
+    planner.update([((4, 3), 'W'), ((3, 2), ' ')])  # Block the bottom corridor, open a gap above it
+    stats = SearchStats(traceMemory=False)
+    print("After the edit:", planner.path(stats=stats), "expanded", stats.expanded)
@@ -0,0 +1,199 @@
+# Hierarchical path-finding (HPA*) on the Maze.py grid model, for many start/goal queries on one large grid.
+#
+# Preprocessing cuts the grid into square clusters. Wherever two neighbouring clusters share a run of open
+# cells along their border an entrance is placed (one in the middle of the run, one at each end of long runs).
+# Entrances become the nodes of a small abstract graph: an edge of cost 1 crosses each border, and inside a
+# cluster every pair of entrances is joined by its local BFS distance. The graph is saved as JSON so later runs
+# skip the preprocessing. A query connects start and goal to the entrances of their own cluster, runs A* on the
+# abstract graph and refines every abstract edge back into grid cells with a BFS bounded to one cluster.
+# Paths are near-optimal, not guaranteed shortest.
+
+import hashlib
+import heapq
+import json
+from collections import deque
+from itertools import count
+
+from Maze import dirs
+from Search_stats import instrumented
+
+
+def gridDigest(grid):
+    return hashlib.sha1('\n'.join(''.join(row) for row in grid).encode()).hexdigest()
+
+
+class HierarchicalMaze:
+    def __init__(self, grid, clusterSize=10):
+        self.grid = grid
+        self.rows = len(grid)
+        self.cols = len(grid[0])
+        self.clusterSize = clusterSize
+        self.nodes = []  # Entrance cells
+        self.index = {}  # Entrance cell -> node number
+        self.edges = []  # Per node: list of (neighbour node, cost)
+        self.byCluster = None
+
+    def isOpen(self, cell):
+        i, j = cell
+        return 0 <= i < self.rows and 0 <= j < self.cols and self.grid[i][j] != 'W'
+
+    def cluster(self, cell):
+        return cell[0] // self.clusterSize, cell[1] // self.clusterSize
+
+    def bounds(self, cell):
+        ci, cj = self.cluster(cell)
+        size = self.clusterSize
+        return ci * size, min((ci + 1) * size, self.rows), cj * size, min((cj + 1) * size, self.cols)
+
+    def localBfs(self, source, bounds):
+        # Distances and parents from source, never leaving the cluster described by bounds
+        top, bottom, left, right = bounds
+        dist = {source: 0}
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            i, j = queue.popleft()
+            for di, dj in dirs:
+                cell = (i + di, j + dj)
+                if top <= cell[0] < bottom and left <= cell[1] < right and cell not in dist and self.isOpen(cell):
+                    dist[cell] = dist[(i, j)] + 1
+                    parent[cell] = (i, j)
+                    queue.append(cell)
+        return dist, parent
+
+    def addNode(self, cell):
+        if cell not in self.index:
+            self.index[cell] = len(self.nodes)
+            self.nodes.append(cell)
+            self.edges.append([])
+        return self.index[cell]
+
+    def addEdge(self, a, b, cost):
+        self.edges[a].append((b, cost))
+        self.edges[b].append((a, cost))
+
+    def build(self):
+        size = self.clusterSize
+        # Entrances along every border between horizontally and vertically adjacent clusters
+        for vertical in (True, False):
+            lines = range(size, self.rows, size) if vertical else range(size, self.cols, size)
+            length = self.cols if vertical else self.rows
+            for line in lines:
+                for start in range(0, length, size):
+                    run = []
+                    for k in range(start, min(start + size, length)):
+                        a, b = ((line - 1, k), (line, k)) if vertical else ((k, line - 1), (k, line))
+                        if self.isOpen(a) and self.isOpen(b):
+                            run.append((a, b))
+                        if run and (not (self.isOpen(a) and self.isOpen(b)) or k == min(start + size, length) - 1):
+                            picks = [run[0], run[-1]] if len(run) >= 6 else [run[len(run) // 2]]
+                            for a2, b2 in picks:
+                                self.addEdge(self.addNode(a2), self.addNode(b2), 1)
+                            run = []
+
+        # Intra-cluster edges: local BFS distance between every pair of entrances of a cluster
+        for nodes in self.members().values():
+            for a in nodes:
+                dist, _ = self.localBfs(self.nodes[a], self.bounds(self.nodes[a]))
+                for b in nodes:
+                    if a < b and self.nodes[b] in dist:
+                        self.addEdge(a, b, dist[self.nodes[b]])
+        return self
+
+    def members(self):
+        # Entrance nodes grouped by cluster
+        if self.byCluster is None:
+            self.byCluster = {}
+            for n, cell in enumerate(self.nodes):
+                self.byCluster.setdefault(self.cluster(cell), []).append(n)
+        return self.byCluster
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'digest': gridDigest(self.grid), 'clusterSize': self.clusterSize,
+                       'nodes': self.nodes, 'edges': self.edges}, f)
+
+    @classmethod
+    def load(cls, path, grid):
+        with open(path) as f:
+            data = json.load(f)
+        if data['digest'] != gridDigest(grid):
+            raise ValueError(f"{path} was built for a different maze")
+        maze = cls(grid, data['clusterSize'])
+        maze.nodes = [tuple(cell) for cell in data['nodes']]
+        maze.index = {cell: n for n, cell in enumerate(maze.nodes)}
+        maze.edges = [[tuple(edge) for edge in edges] for edges in data['edges']]
+        return maze
+
+    def localPath(self, a, b):
+        # Grid cells from a to b inside one cluster (or across one border when a and b are adjacent)
+        if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and self.cluster(a) != self.cluster(b):
+            return [a, b]
+        _, parent = self.localBfs(a, self.bounds(a))
+        path = [b]
+        while path[-1] != a:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    @instrumented
+    def path(self, start, goal, stats=None):
+        # stats counts the A* on the abstract graph; the local searches that refine its edges are not counted
+        if not (self.isOpen(start) and self.isOpen(goal)):
+            return []
+        # Temporary links from start and goal to the entrances of their own clusters
+        links = {}
+        for cell in (start, goal):
+            dist, _ = self.localBfs(cell, self.bounds(cell))
+            entrances = self.members().get(self.cluster(cell), [])
+            links[cell] = [(self.nodes[n], dist[self.nodes[n]]) for n in entrances if self.nodes[n] in dist]
+            if cell == start and goal in dist:
+                links[start].append((goal, dist[goal]))
+
+        def neighbours(cell):
+            result = [(self.nodes[n], cost) for n, cost in self.edges[self.index[cell]]] if cell in self.index else []
+            result += links[start] if cell == start else []
+            result += [(goal, cost) for entrance, cost in links[goal] if entrance == cell]
+            return result
+
+        # A* on the abstract graph with the Manhattan distance as heuristic
+        tie = count()
+        cost = {start: 0}
+        parent = {start: None}
+        toDo = [(abs(start[0] - goal[0]) + abs(start[1] - goal[1]), 0, next(tie), start)]
+        while toDo:
+            _, g, _, cell = heapq.heappop(toDo)
+            if g > cost[cell]:
+                continue
+            if cell == goal:
+                abstract = [cell]
+                while parent[abstract[-1]] is not None:
+                    abstract.append(parent[abstract[-1]])
+                abstract.reverse()
+                path = [start]
+                for a, b in zip(abstract, abstract[1:]):  # Refine every abstract edge into grid cells
+                    path += self.localPath(a, b)[1:]
+                return path
+            successors = neighbours(cell)
+            for neighbour, step in successors:
+                if g + step < cost.get(neighbour, float('inf')):
+                    cost[neighbour] = g + step
+                    parent[neighbour] = cell
+                    h = abs(neighbour[0] - goal[0]) + abs(neighbour[1] - goal[1])
+                    heapq.heappush(toDo, (g + step + h, g + step, next(tie), neighbour))
+                elif stats:
+                    stats.duplicates += 1
+            if stats:
+                stats.expanded += 1
+                stats.generated += len(successors)
+                stats.frontier(len(toDo))
+        return []  # No path between start and goal
+
+
+if __name__ == "__main__":
+    from Maze import maze
+
+    abstraction = HierarchicalMaze(maze, clusterSize=2).build()
+    abstraction.save('maze.hpa.json')
+    abstraction = HierarchicalMaze.load('maze.hpa.json', maze)
+    print("Path:", abstraction.path((4, 0), (0, 4)))
@@ -0,0 +1,174 @@
+# Out-of-core maze storage and search for grids larger than RAM.
+#
+# convertMaze streams a text maze (one row per line, 'W' or '#' for walls, 'G' for goals) into a binary grid
+# file: a small header, one bit per cell for "open", and the goal cells at the end. The search maps that file,
+# keeps its visited bitmap (1 bit per cell) and parent directions (2 bits per cell) in mmap-backed scratch files,
+# and streams each BFS layer through a file in blocks, so resident memory stays bounded by the block size and the
+# page cache, not by the number of cells.
+#
+#   python Maze_out_of_core.py big.maze big.grid 0 0
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from Maze import dirs
+from Search_stats import instrumented
+
+MAGIC = b"MAZ1"
+HEADER = struct.Struct('<4sQQQ4x')  # Magic, rows, cols, number of goals, padded to 32 bytes
+
+
+def convertMaze(textPath, gridPath):
+    """Write the grid file for a text maze. Raises ValueError if the rows are not all the same length; the
+    half-written grid file is removed then, so no wrong grid is left behind."""
+    try:
+        writeGrid(textPath, gridPath)
+    except ValueError:
+        os.remove(gridPath)
+        raise
+
+
+def writeGrid(textPath, gridPath):
+    goals = []
+    rows = cols = 0
+    with open(textPath) as src, open(gridPath, 'wb') as dst:
+        dst.write(HEADER.pack(MAGIC, 0, 0, 0))
+        for number, line in enumerate(src, 1):
+            line = line.rstrip('\r\n')
+            if not line:
+                continue
+            if rows == 0:
+                cols = len(line)
+            elif len(line) != cols:
+                raise ValueError(f"{textPath}:{number}: row of {len(line)} cells, the first row has {cols}")
+            bits = bytearray((cols + 7) // 8)
+            for j, ch in enumerate(line):
+                if ch not in 'W#':
+                    bits[j >> 3] |= 1 << (j & 7)
+                if ch == 'G':
+                    goals.append((rows, j))
+            dst.write(bits)
+            rows += 1
+        for i, j in goals:
+            dst.write(struct.pack('<QQ', i, j))
+        dst.seek(0)
+        dst.write(HEADER.pack(MAGIC, rows, cols, len(goals)))
+
+
+class MazeFile:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, self.cols, goalCount = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a maze grid file")
+        self.rowBytes = (self.cols + 7) // 8
+        end = HEADER.size + self.rows * self.rowBytes
+        self.goals = {i * self.cols + j for i, j in struct.iter_unpack('<QQ', self.data[end:end + 16 * goalCount])}
+
+    def isOpen(self, i, j):
+        if not (0 <= i < self.rows and 0 <= j < self.cols):
+            return False
+        return self.data[HEADER.size + i * self.rowBytes + (j >> 3)] >> (j & 7) & 1
+
+    def close(self):
+        self.data.close()
+
+
+def scratch(directory, name, size):
+    # A zero-filled file of size bytes, mapped read-write
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.truncate(max(size, 1))
+    with open(path, 'r+b') as f:
+        return mmap.mmap(f.fileno(), 0)
+
+
+def readBlocks(path, blockSize):
+    with open(path, 'rb') as f:
+        while True:
+            block = array('Q')
+            try:
+                block.fromfile(f, blockSize)
+            except EOFError:  # Last, partial block
+                if block:
+                    yield block
+                return
+            yield block
+
+
+# Breadth-First Search with all per-cell state on disk. Layers are streamed through files of cell indices
+# blockSize entries at a time; the path is read back from the parent direction file. With stats the frontier is
+# the size of a layer, which lives on disk.
+@instrumented
+def bfsOutOfCore(grid, start, workDir=None, blockSize=1 << 16, stats=None):
+    rows, cols = grid.rows, grid.cols
+    if not grid.isOpen(*start):
+        return []
+    with tempfile.TemporaryDirectory(dir=workDir) as work:
+        visited = scratch(work, 'visited', (rows * cols + 7) // 8)
+        parents = scratch(work, 'parents', (rows * cols + 3) // 4)
+        layerPath, nextPath = os.path.join(work, 'layer'), os.path.join(work, 'next')
+
+        startIndex = start[0] * cols + start[1]
+        visited[startIndex >> 3] |= 1 << (startIndex & 7)
+        with open(layerPath, 'wb') as out:
+            array('Q', [startIndex]).tofile(out)
+        found = startIndex if startIndex in grid.goals else None
+
+        while found is None and os.path.getsize(layerPath):
+            with open(nextPath, 'wb') as out:
+                pending = array('Q')
+                for block in readBlocks(layerPath, blockSize):
+                    for index in block:
+                        i, j = divmod(index, cols)
+                        if stats:
+                            stats.expanded += 1
+                        for d, (di, dj) in enumerate(dirs):
+                            ni, nj = i + di, j + dj
+                            if not grid.isOpen(ni, nj):
+                                continue
+                            n = ni * cols + nj
+                            if stats:
+                                stats.generated += 1
+                            if visited[n >> 3] >> (n & 7) & 1:
+                                if stats:
+                                    stats.duplicates += 1
+                                continue
+                            visited[n >> 3] |= 1 << (n & 7)
+                            parents[n >> 2] |= d << ((n & 3) * 2)
+                            if n in grid.goals and found is None:
+                                found = n
+                            pending.append(n)
+                            if len(pending) >= blockSize:
+                                pending.tofile(out)
+                                pending = array('Q')
+                pending.tofile(out)
+            os.replace(nextPath, layerPath)
+            if stats:
+                stats.frontier(os.path.getsize(layerPath) // pending.itemsize)
+
+        path = []
+        if found is not None:
+            current = found
+            path.append(divmod(current, cols))
+            while current != startIndex:
+                di, dj = dirs[parents[current >> 2] >> ((current & 3) * 2) & 3]
+                current -= di * cols + dj
+                path.append(divmod(current, cols))
+            path.reverse()
+        visited.close()
+        parents.close()
+        return path
+
+
+if __name__ == "__main__":
+    textPath, gridPath, i, j = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+    convertMaze(textPath, gridPath)
+    grid = MazeFile(gridPath)
+    path = bfsOutOfCore(grid, (i, j))
+    print(f"Shortest path has {len(path) - 1} moves" if path else "No path to the goal from the starting position.")
@@ -0,0 +1,352 @@
+# Search strategies shared by the maze, sliding tiles and Sudoku problems.
+#
+# A problem describes itself through a small protocol (the Problem class below): where it starts, which states
+# follow a state, which states are goals, a hashable key per state and optionally a heuristic. Every strategy here
+# only talks to that protocol, so a strategy that gets faster gets faster for all three families at once. All steps
+# cost 1, as in every problem in this folder. A strategy returns the path from the start to a goal as a list of
+# states, or [] if it finds none, and counts its work in stats=SearchStats() if given (see Search_stats).
+#
+#   python Search.py    runs every strategy on an instance of each family
+
+import heapq
+import random
+from collections import deque
+from itertools import count, repeat
+
+from Maze import dirs
+from Search_stats import SearchStats, instrumented
+from Sliding_tiles_packed import IncrementalHeuristic, PackedBoard
+from Sudoku import SudokuState, is_goal, next_states
+
+
+class Problem:
+    """The protocol the strategies search on. Subclasses set start and override nextStates and isGoal.
+
+    A problem whose heuristic is cheaper to update than to recompute can also set expand(state, h) to return the
+    successors of a state of heuristic h as (state, heuristic) pairs; the informed strategies then use it instead
+    of nextStates plus a heuristic call per successor."""
+
+    expand = None
+
+    def __init__(self, start):
+        self.start = start
+
+    def nextStates(self, state):
+        raise NotImplementedError
+
+    def isGoal(self, state):
+        raise NotImplementedError
+
+    def key(self, state):
+        """Hashable stand-in for a state in visited sets and cost tables (the state itself by default)."""
+        return state
+
+    def heuristic(self, state):
+        """Estimate of the steps left to a goal; 0 turns A* into uniform-cost search."""
+        return 0
+
+
+def successors(problem, stats=None):
+    # expand(state, h) of the problem, or pairs from nextStates whose heuristic is None: the strategy then
+    # computes it itself, only for the states it keeps, as the heuristic can cost more than the rest of a step.
+    # With stats every call counts as an expansion and its pairs as generated.
+    if problem.expand:
+        expand = stats.timed(problem.expand) if stats else problem.expand
+    else:
+        nextStates = problem.nextStates
+        expand = lambda state, h: zip(nextStates(state), repeat(None))
+    if not stats:
+        return expand
+
+    def counted(state, h):
+        pairs = list(expand(state, h))
+        stats.expanded += 1
+        stats.generated += len(pairs)
+        return pairs
+    return counted
+
+
+def pathTo(parent, state, key):
+    path = [state]
+    while parent[key(state)] is not None:
+        state = parent[key(state)]
+        path.append(state)
+    path.reverse()
+    return path
+
+
+@instrumented
+def breadthFirst(problem, stats=None):
+    """Shortest path by breadth-first search. The goal test is done on generation, one level earlier than on
+    expansion, which is still shortest with unit step costs."""
+    key = problem.key
+    start = problem.start
+    parent = {key(start): None}
+    queue = deque([start])
+    found = start if problem.isGoal(start) else None
+    while queue and found is None:
+        current = queue.popleft()
+        children = problem.nextStates(current)
+        for state in children:
+            k = key(state)
+            if k not in parent:
+                parent[k] = current
+                if problem.isGoal(state):
+                    found = state
+                    break
+                queue.append(state)
+            elif stats:
+                stats.duplicates += 1
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(queue))
+    return pathTo(parent, found, key) if found is not None else []
+
+
+@instrumented
+def depthFirst(problem, limit=None, stats=None):
+    """Some path by depth-first search, not necessarily the shortest. Every state is entered once, so open grids
+    don't explode into all their paths. With a depth limit a state is entered again when it is reached at a
+    smaller depth than before, otherwise a first visit deep down could hide a path that fits within the limit."""
+    key = problem.key
+    path = [problem.start]
+    depth = {key(problem.start): 0}
+    stack = [iter(problem.nextStates(problem.start))]
+    if stats:
+        stats.expanded += 1
+    found = problem.isGoal(problem.start)
+    while stack and not found:
+        state = next(stack[-1], None)
+        if state is None:  # Every child tried, back up
+            stack.pop()
+            path.pop()
+            continue
+        if stats:
+            stats.generated += 1
+        k = key(state)
+        if k in depth and (limit is None or depth[k] <= len(path)):
+            if stats:
+                stats.duplicates += 1
+            continue
+        depth[k] = len(path)
+        path.append(state)
+        if problem.isGoal(state):
+            found = True
+        elif limit is None or len(path) <= limit:
+            stack.append(iter(problem.nextStates(state)))
+            if stats:
+                stats.expanded += 1
+                stats.frontier(len(path))
+        else:
+            path.pop()
+    return path if found else []
+
+
+@instrumented
+def aStar(problem, weight=1, stats=None):
+    """A* on g + weight * h. With weight 1 and an admissible heuristic the path is shortest; with weight w > 1 it
+    is at most w times longer than the shortest, usually found after far fewer expansions."""
+    key, expand = problem.key, successors(problem, stats)
+    heuristic = stats.timed(problem.heuristic) if stats else problem.heuristic
+    start = problem.start
+    tie = count()
+    cost = {key(start): 0}
+    parent = {key(start): None}
+    closed = set()
+    h = heuristic(start)
+    toDo = [(weight * h, 0, next(tie), h, start)]  # Ties on f go to the deepest state first
+    while toDo:
+        _, negG, _, h, current = heapq.heappop(toDo)
+        g, k = -negG, key(current)
+        if k in closed or g > cost[k]:  # Stale entry (lazy decrease-key)
+            continue
+        if problem.isGoal(current):
+            return pathTo(parent, current, key)
+        closed.add(k)
+        for state, childH in expand(current, h):
+            s = key(state)
+            if s not in closed and g + 1 < cost.get(s, g + 2):
+                cost[s] = g + 1
+                parent[s] = current
+                if childH is None:
+                    childH = heuristic(state)
+                heapq.heappush(toDo, (g + 1 + weight * childH, -(g + 1), next(tie), childH, state))
+            elif stats:
+                stats.duplicates += 1
+        if stats:
+            stats.frontier(len(toDo))
+    return []
+
+
+def weightedAStar(problem, weight=2, stats=None):
+    """A* with an inflated heuristic, see aStar."""
+    return aStar(problem, weight, stats=stats)
+
+
+@instrumented
+def idaStar(problem, stats=None):
+    """Shortest path by iterative deepening A*: depth-first passes bounded by f = g + h, the bound rising to the
+    smallest f that was cut off. Memory grows with the depth only, at the price of expanding states again."""
+    key, expand = problem.key, successors(problem, stats)
+    heuristic = stats.timed(problem.heuristic) if stats else problem.heuristic
+    path = [problem.start]
+    onPath = {key(problem.start)}
+
+    def search(g, h, threshold):
+        current = path[-1]
+        if h is None:
+            h = heuristic(current)
+        f = g + h
+        if f > threshold:
+            return f
+        if problem.isGoal(current):
+            return True
+        if stats:
+            stats.frontier(len(path))
+        smallest = float('inf')
+        for state, childH in expand(current, h):
+            k = key(state)
+            if k in onPath:
+                if stats:
+                    stats.duplicates += 1
+                continue
+            path.append(state)
+            onPath.add(k)
+            result = search(g + 1, childH, threshold)
+            if result is True:
+                return True
+            path.pop()
+            onPath.discard(k)
+            smallest = min(smallest, result)
+        return smallest
+
+    threshold = h = heuristic(problem.start)
+    while True:
+        result = search(0, h, threshold)
+        if stats:
+            stats.iterations += 1
+        if result is True or result == float('inf'):
+            return path if result is True else []
+        threshold = result
+
+
+@instrumented
+def beam(problem, width=100, stats=None):
+    """Breadth-first search that keeps only the width best states (by heuristic) of every level. Fast and lean,
+    but it can miss every path when a needed state falls off the beam, and the path is not always shortest."""
+    key, expand = problem.key, successors(problem, stats)
+    heuristic = stats.timed(problem.heuristic) if stats else problem.heuristic
+    start = problem.start
+    parent = {key(start): None}
+    level = [(start, heuristic(start))]
+    while level:
+        children = []
+        for current, h in level:
+            if problem.isGoal(current):
+                return pathTo(parent, current, key)
+            for state, childH in expand(current, h):
+                k = key(state)
+                if k not in parent:
+                    parent[k] = current
+                    children.append((state, heuristic(state) if childH is None else childH))
+                elif stats:
+                    stats.duplicates += 1
+        level = heapq.nsmallest(width, children, key=lambda child: child[1])
+        if stats:
+            stats.frontier(len(level))
+    return []
+
+
+STRATEGIES = {'bfs': breadthFirst, 'dfs': depthFirst, 'astar': aStar, 'idastar': idaStar,
+              'weighted': weightedAStar, 'beam': beam}
+
+
+class MazeProblem(Problem):
+    """A maze as in Maze.py: a list of rows with 'W' for walls and 'G' for goals, 4 moves, Manhattan heuristic."""
+
+    def __init__(self, grid, start):
+        super().__init__(start)
+        self.grid = grid
+        self.goals = [(i, j) for i, row in enumerate(grid) for j, cell in enumerate(row) if cell == 'G']
+
+    def nextStates(self, state):
+        i, j = state
+        return [(i + di, j + dj) for di, dj in dirs
+                if 0 <= i + di < len(self.grid) and 0 <= j + dj < len(self.grid[0])
+                and self.grid[i + di][j + dj] != 'W']
+
+    def isGoal(self, state):
+        return self.grid[state[0]][state[1]] == 'G'
+
+    def heuristic(self, state):
+        return min((abs(state[0] - gi) + abs(state[1] - gj) for gi, gj in self.goals), default=0)
+
+
+class SlidingTilesProblem(Problem):
+    """A sliding-tile board, searched on packed integer states (see Sliding_tiles_packed). The heuristic is the
+    Manhattan distance plus linear conflicts, updated move by move through expand; board.unpack turns the states
+    of a path back into lists."""
+
+    def __init__(self, state):
+        self.board = PackedBoard(len(state))
+        super().__init__(self.board.pack(state))
+        self.nextStates = self.board.nextStates
+        self.isGoal = self.board.isGoal
+        self.heuristic = IncrementalHeuristic(self.board)
+        self.expand = self.heuristic.expand
+
+
+class SudokuProblem(Problem):
+    """A Sudoku grid, filled one cell at a time on the cell with the fewest candidates. The heuristic counts the
+    empty cells, which is exactly the number of steps left on any path that reaches a goal."""
+
+    def __init__(self, grid):
+        super().__init__(SudokuState([row[:] for row in grid]))
+
+    def nextStates(self, state):
+        return next_states(state)
+
+    def isGoal(self, state):
+        return is_goal(state)
+
+    def heuristic(self, state):
+        return sum(row.count(0) for row in state)
+
+
+def randomWalk(board, steps, rng):
+    """A board state steps random moves away from the goal (never undoing the move just made)."""
+    code, previous = board.goal, None
+    for _ in range(steps):
+        code, previous = rng.choice([s for s in board.nextStates(code) if s != previous]), code
+    return board.unpack(code)
+
+
+def benchmark(seed=0):
+    """Run every strategy on a maze, an 8-puzzle, a 15-puzzle and a Sudoku and print length, nodes and time.
+    Plain DFS and BFS are left out where the state space is too large for them to finish."""
+    rng = random.Random(seed)
+    size = 60
+    grid = [['W' if rng.random() < 0.25 else ' ' for _ in range(size)] for _ in range(size)]
+    grid[0][0], grid[size - 1][size - 1] = ' ', 'G'
+    sudoku = [[5, 3, 0, 0, 7, 0, 0, 0, 0], [6, 0, 0, 1, 9, 5, 0, 0, 0], [0, 9, 8, 0, 0, 0, 0, 6, 0],
+              [8, 0, 0, 0, 6, 0, 0, 0, 3], [4, 0, 0, 8, 0, 3, 0, 0, 1], [7, 0, 0, 0, 2, 0, 0, 0, 6],
+              [0, 6, 0, 0, 0, 0, 2, 8, 0], [0, 0, 0, 4, 1, 9, 0, 0, 5], [0, 0, 0, 0, 8, 0, 0, 0, 0]]
+    instances = [
+        ("maze 60x60", MazeProblem(grid, (0, 0)), STRATEGIES),
+        ("8-puzzle", SlidingTilesProblem(randomWalk(PackedBoard(3), 40, rng)),
+         {name: STRATEGIES[name] for name in ('bfs', 'astar', 'idastar', 'weighted', 'beam')}),
+        ("15-puzzle", SlidingTilesProblem(randomWalk(PackedBoard(4), 36, rng)),
+         {name: STRATEGIES[name] for name in ('astar', 'idastar', 'weighted', 'beam')}),
+        ("sudoku", SudokuProblem(sudoku), STRATEGIES),
+    ]
+    for name, problem, strategies in instances:
+        for strategy, search in strategies.items():
+            stats = SearchStats(traceMemory=False)
+            path = search(problem, stats=stats)
+            print(f"{name:12} {strategy:9} length {len(path) - 1 if path else '-':>4}  "
+                  f"{stats.expanded:>8} nodes  {stats.seconds * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,95 @@
+# Counters that show how hard a search worked, so a regression can be told apart from a harder instance.
+#
+# Every search entry point (the maze, sliding tiles and Sudoku solvers and the strategies in Search.py) takes an
+# optional stats=SearchStats(); it is the one way they report how much work they did. Without it they run as
+# before, apart from one `if stats` test per expanded node. With it they count:
+#
+#   generated         successor states produced (for jump points: every cell a scan looked at)
+#   expanded          states whose successors were produced (for exact cover: guesses)
+#   duplicates        successors thrown away because they were already seen (on the path, queued or visited)
+#   iterations        passes of an iterative deepening search, runs of a restarted one
+#   peakFrontier      largest number of entries waiting in the queue, stack or heap (for depth-first: the path)
+#   peakMemory        peak bytes allocated during the search, from tracemalloc (None if traceMemory is off)
+#   heuristicSeconds  time spent inside the heuristic
+#   seconds           wall time of the whole call
+#
+#   stats = SearchStats()
+#   AStarSearch(start, heuristic_manhattan_distance, stats=stats)
+#   print(stats.toJson())
+#
+# tracemalloc slows Python allocation down noticeably while it runs, so for timing runs pass traceMemory=False.
+# The same SearchStats can be passed to several searches, the counters then add up.
+
+import json
+import time
+import tracemalloc
+from functools import wraps
+
+
+class SearchStats:
+    def __init__(self, traceMemory=True):
+        self.traceMemory = traceMemory
+        self.generated = 0
+        self.expanded = 0
+        self.duplicates = 0
+        self.iterations = 0
+        self.peakFrontier = 0
+        self.peakMemory = None
+        self.heuristicSeconds = 0.0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self.startedTracing = self.traceMemory and not tracemalloc.is_tracing()
+        if self.startedTracing:
+            tracemalloc.start()
+        elif self.traceMemory:
+            tracemalloc.reset_peak()  # Someone else is tracing already, measure from here
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self.began
+        if self.traceMemory:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.peakMemory = max(self.peakMemory or 0, peak)
+            if self.startedTracing:
+                tracemalloc.stop()
+        return False
+
+    def frontier(self, size):
+        if size > self.peakFrontier:
+            self.peakFrontier = size
+
+    def timed(self, heuristic):
+        """The heuristic, with the time spent in it added to heuristicSeconds. If it has an expand method (see
+        IncrementalHeuristic) that is timed as well, successor generation included."""
+        @wraps(heuristic)
+        def timedHeuristic(*args):
+            began = time.perf_counter()
+            try:
+                return heuristic(*args)
+            finally:
+                self.heuristicSeconds += time.perf_counter() - began
+        if getattr(heuristic, 'expand', None):
+            timedHeuristic.expand = self.timed(heuristic.expand)
+        return timedHeuristic
+
+    def asDict(self):
+        return {'generated': self.generated, 'expanded': self.expanded, 'duplicates': self.duplicates,
+                'iterations': self.iterations, 'peakFrontier': self.peakFrontier, 'peakMemory': self.peakMemory,
+                'heuristicSeconds': self.heuristicSeconds, 'seconds': self.seconds}
+
+    def toJson(self, **options):
+        return json.dumps(self.asDict(), **options)
+
+
+def instrumented(search):
+    """Decorator for search entry points: runs the search inside stats (wall time and memory) when stats is given.
+    The search itself receives stats too, to count nodes."""
+    @wraps(search)
+    def wrapper(*args, stats=None, **kwargs):
+        if stats is None:
+            return search(*args, **kwargs)
+        with stats:
+            return search(*args, stats=stats, **kwargs)
+    return wrapper
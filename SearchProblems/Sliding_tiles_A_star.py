@@ -1,4 +1,10 @@
+import heapq
+import time
 from collections import deque
+from itertools import count
+
+from Search_stats import instrumented
+from Sliding_tiles_solvability import Unsolvable, isSolvable
 
 N = 3  # You can change N to the desired puzzle size
 
@@ -60,13 +66,21 @@ def heuristic_manhattan_distance(state):
     for i in range(N):
         for j in range(N):
             if state[i][j] != 0:
-                goal_row, goal_col = divmod(state[i][j] - 1, N)
+                goal_row, goal_col = divmod(state[i][j], N)  # Tile t belongs at cell t, as in isGoal
                 distance += abs(i - goal_row) + abs(j - goal_col)
     return distance
 
 
-def AStarSearch(s, heuristic):
-    toDo = [[s]]  # Initialize a list of paths to explore
+@instrumented
+def AStarSearch(s, heuristic, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # With a PackedBoard the search runs on packed integer states, so the heuristic must take a packed
+    # state as well (e.g. board.manhattan); the path is unpacked at the end
+    goalTest, successors = (board.isGoal, board.nextStates) if board else (isGoal, nextStates)
+    toDo = [[board.pack(s) if board else s]]  # Initialize a list of paths to explore
+    if stats:
+        heuristic = stats.timed(heuristic)
 
     while toDo:
         toDo.sort(key=lambda path: len(path) + heuristic(path[-1]))  # Sort the paths based on g(n) + h(n)
@@ -74,25 +88,260 @@ def AStarSearch(s, heuristic):
         toDo = toDo[1:]  # Remove the path from the toDo list
         current = path[-1]  # Get the last node on the path so far
 
-        if isGoal(current):  # If the current state is the goal, return the path
-            return path
+        if goalTest(current):  # If the current state is the goal, return the path
+            return [board.unpack(code) for code in path] if board else path
 
-        for state in nextStates(current):  # Generate successor states
+        children = successors(current)  # Generate successor states
+        for state in children:
             if state not in [p[-1] for p in toDo]:  # Check if the state is not previously explored
                 new_path = list(path)
                 new_path.append(state)
                 toDo.append(new_path)  # Add the extended path to the list
+            elif stats:
+                stats.duplicates += 1
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(toDo))
+
+    return ["Error: No path found"]
+
+
+def stateKey(state):
+    return tuple(map(tuple, state))  # Hashable copy of a board, used as dictionary key
+
+
+@instrumented
+def AStarSearchHeap(s, heuristic, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # Packed states are already hashable ints, list boards are keyed by a tuple copy
+    goalTest, successors, keyOf = (board.isGoal, board.nextStates, int) if board else (isGoal, nextStates, stateKey)
+    if board:
+        s = board.pack(s)
+    if stats:
+        heuristic = stats.timed(heuristic)
+    # An incremental heuristic (see IncrementalHeuristic) derives each child's h from its parent's
+    expand = getattr(heuristic, 'expand', None) or (lambda state, h: [(c, heuristic(c)) for c in successors(state)])
+    tie = count()  # Insertion counter so the heap never has to compare two boards
+    startKey = keyOf(s)
+    cost = {startKey: 0}  # Cheapest known g(n) for every state that was ever queued
+    parent = {startKey: None}  # Parent pointers, the path is rebuilt from these at the end
+    closed = set()  # States that have already been expanded
+    toDo = [(heuristic(s), 0, next(tie), s, heuristic(s))]  # Binary heap ordered by f(n) = g(n) + h(n)
+
+    while toDo:
+        _, g, _, current, h = heapq.heappop(toDo)  # Cheapest path in O(log n)
+        key = keyOf(current)
+        if key in closed or g > cost[key]:  # Stale entry left behind by a cheaper push (lazy decrease-key)
+            continue
+
+        if goalTest(current):  # Walk the parent pointers back to the start
+            path = []
+            while key is not None:
+                path.append(board.unpack(key) if board else [list(row) for row in key])
+                key = parent[key]
+            path.reverse()
+            return path
+
+        closed.add(key)
+        children = expand(current, h)  # Generate successor states with their heuristic
+        for state, childH in children:
+            childKey = keyOf(state)
+            if childKey not in closed and g + 1 < cost.get(childKey, float('inf')):
+                cost[childKey] = g + 1
+                parent[childKey] = key
+                heapq.heappush(toDo, (g + 1 + childH, g + 1, next(tie), state, childH))
+            elif stats:
+                stats.duplicates += 1
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(toDo))
 
     return ["Error: No path found"]
 
 
-# Example usage:
-start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
+@instrumented
+def IDAStarSearch(s, heuristic, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # Iterative deepening A*: depth-first search bounded by f(n) = g(n) + h(n), restarted with the smallest
+    # f that exceeded the bound. Only the current path is kept, so memory grows with the depth, not the frontier.
+    goalTest, successors = (board.isGoal, board.nextStates) if board else (isGoal, nextStates)
+    if stats:
+        heuristic = stats.timed(heuristic)
+    expand = getattr(heuristic, 'expand', None) or (lambda state, h: [(c, heuristic(c)) for c in successors(state)])
+    path = [board.pack(s) if board else s]
+    found = -1
+
+    def search(g, h, threshold):
+        current = path[-1]
+        f = g + h
+        if f > threshold:  # Cut off, but remember by how much for the next threshold
+            return f
+        if goalTest(current):
+            return found
+        smallest = float('inf')
+        children = expand(current, h)
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(path))
+        for state, childH in children:
+            if len(path) > 1 and state == path[-2]:  # Never undo the move that led here
+                if stats:
+                    stats.duplicates += 1
+                continue
+            path.append(state)
+            t = search(g + 1, childH, threshold)
+            if t == found:
+                return found
+            smallest = min(smallest, t)
+            path.pop()
+        return smallest
+
+    rootH = heuristic(path[0])
+    threshold = rootH
+    while True:
+        t = search(0, rootH, threshold)
+        if stats:
+            stats.iterations += 1
+        if t == found:
+            return [board.unpack(code) for code in path] if board else path
+        if t == float('inf'):
+            return ["Error: No path found"]
+        threshold = t
+
+
+class AnytimeResult(list):
+    # Path returned by AnytimeSearch: the best one found so far, with a proof of how good it is. The optimal
+    # solution has at least length / bound moves; bound 1.0 means this path is a shortest one.
+    def __init__(self, path, bound, lowerBound):
+        super().__init__(path)
+        self.bound = bound
+        self.lowerBound = lowerBound
+        self.optimal = bound == 1.0
+
+
+@instrumented
+def AnytimeSearch(s, heuristic, board=None, budget=1.0, weight=3.0, beamWidth=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # Anytime weighted A*: the open list is ordered by g(n) + weight * h(n), which finds a first solution after
+    # few expansions. The search then goes on with the same open list, skipping every node whose g(n) + h(n)
+    # can't beat the best solution so far, and every better solution replaces it. Each time, the weight is
+    # halved towards 1 and the open list re-sorted, so the search drifts towards plain A* while time remains.
+    # With beamWidth the first solution comes from a beam search (only the beamWidth best states of every
+    # depth are kept) instead, which is faster still on large boards.
+    # When budget seconds are up, or the open list is empty (then the path is optimal), the best path is
+    # returned as an AnytimeResult. The smallest g(n) + h(n) left open is a lower bound on the optimal length
+    # for an admissible heuristic, so bound = length / lower bound is a proven suboptimality factor.
+    # An empty AnytimeResult with bound inf means no solution was found in time.
+    deadline = time.perf_counter() + budget
+    goalTest, successors, keyOf = (board.isGoal, board.nextStates, int) if board else (isGoal, nextStates, stateKey)
+    if board:
+        s = board.pack(s)
+    if stats:
+        heuristic = stats.timed(heuristic)
+    expand = getattr(heuristic, 'expand', None) or (lambda state, h: [(c, heuristic(c)) for c in successors(state)])
+    tie = count()
+    startKey = keyOf(s)
+    startH = heuristic(s)
+    cost = {startKey: 0}  # Cheapest known g(n); a cheaper path reopens a state that was expanded already
+    parent = {startKey: None}
+    toDo = [(weight * startH, 0, next(tie), s, startH)]
+    best, bestCost = None, float('inf')
+
+    def pathTo(key, parent):
+        path = []
+        while key is not None:
+            path.append(board.unpack(key) if board else [list(row) for row in key])
+            key = parent[key]
+        path.reverse()
+        return path
+
+    def lowerBound():
+        return min([g + h for _, g, _, _, h in toDo] + [bestCost])
+
+    def improved(path):
+        nonlocal best, bestCost, weight, toDo
+        best, bestCost = path, len(path) - 1
+        weight = 1 + (weight - 1) / 2
+        toDo = [(g + weight * h, g, t, state, h) for _, g, t, state, h in toDo if g + h < bestCost]
+        heapq.heapify(toDo)
+
+    if goalTest(s):
+        improved(pathTo(startKey, parent))
+    elif beamWidth:
+        beamParent = {startKey: None}  # The beam keeps the first, shallowest path to every state
+        level = [(startH, s)]
+        while level and best is None and time.perf_counter() < deadline:
+            children = []
+            for h, current in level:
+                pairs = expand(current, h)
+                for state, childH in pairs:
+                    childKey = keyOf(state)
+                    if childKey not in beamParent:
+                        beamParent[childKey] = keyOf(current)
+                        children.append((childH, state))
+                    elif stats:
+                        stats.duplicates += 1
+                if stats:
+                    stats.expanded += 1
+                    stats.generated += len(pairs)
+            level = heapq.nsmallest(beamWidth, children, key=lambda child: child[0])
+            if stats:
+                stats.frontier(len(level))
+            goal = next((state for h, state in level if goalTest(state)), None)
+            if goal is not None:
+                improved(pathTo(keyOf(goal), beamParent))
+
+    expanded = 0
+    while toDo:
+        expanded += 1
+        if expanded & 255 == 0 and time.perf_counter() > deadline:
+            break
+        _, g, _, current, h = heapq.heappop(toDo)
+        key = keyOf(current)
+        if g > cost[key] or g + h >= bestCost:  # Stale, or can't lead to a shorter solution
+            continue
+        children = expand(current, h)
+        for state, childH in children:
+            childKey = keyOf(state)
+            if g + 1 + childH < bestCost and g + 1 < cost.get(childKey, float('inf')):
+                cost[childKey] = g + 1
+                parent[childKey] = key
+                if goalTest(state):
+                    improved(pathTo(childKey, parent))
+                else:
+                    heapq.heappush(toDo, (g + 1 + weight * childH, g + 1, next(tie), state, childH))
+            elif stats:
+                stats.duplicates += 1
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(toDo))
+
+    if best is None:
+        return AnytimeResult([], float('inf'), lowerBound() if toDo else None)
+    lower = lowerBound()
+    return AnytimeResult(best, bestCost / lower if lower else 1.0, lower)
+
+
+if __name__ == "__main__":
+    # Example usage:
+    start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
 
-result = AStarSearch(start, heuristic_manhattan_distance)
+    result = AStarSearchHeap(start, heuristic_manhattan_distance)  # AStarSearch(start, ...) gives the same path length, only slower
+    # On packed states: board = PackedBoard(N); AStarSearchHeap(start, board.manhattan, board)
+    # For 15- and 24-puzzles use IDAStarSearch(start, IncrementalHeuristic(board), board, stats=SearchStats()),
+    # it only keeps one path and updates Manhattan distance plus linear conflicts move by move
+    # With a time budget: AnytimeSearch(start, IncrementalHeuristic(board), board, budget=2.0) returns the best
+    # path found within 2 seconds, result.bound says how much longer than the shortest it can be at most
 
-# Print the result in a more organized way
-for state in result:
-    for row in state:
-        print(row)
-    print()  # Add an empty line between states
+    # Print the result in a more organized way
+    for state in result:
+        for row in state:
+            print(row)
+        print()  # Add an empty line between states
@@ -1,3 +1,6 @@
+from Sliding_tiles_packed import PackedBoard
+from Search_stats import instrumented
+from Sliding_tiles_solvability import Unsolvable, isSolvable
 
 N = 3  # You can change N to the desired puzzle size
 
@@ -54,32 +57,114 @@ def nextStates(state):
     return result
 
 
-def DepthFirstSearch(s):
-    toDo = [[s]]  # Initialize a stack of paths to explore
+@instrumented
+def DepthFirstSearch(s, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # With a PackedBoard the search runs on packed integer states and unpacks the path at the end
+    goalTest, successors = (board.isGoal, board.nextStates) if board else (isGoal, nextStates)
+    toDo = [[board.pack(s) if board else s]]  # Initialize a stack of paths to explore
 
     while toDo:
         path = toDo.pop()  # Pop the last path from the stack (LIFO)
         current = path[-1]  # Get the last node on the path
 
-        if isGoal(current):  # If the current state is the goal, return the path
-            return path
+        if goalTest(current):  # If the current state is the goal, return the path
+            return [board.unpack(code) for code in path] if board else path
 
-        for state in nextStates(current):  # Generate successor states
-            if state not in [p[-1] for p in path]:  # Check if the state is not previously explored
+        children = successors(current)  # Generate successor states
+        for state in children:
+            if state not in path:  # Check if the state is not already on this path
                 new_path = list(path)
                 new_path.append(state)
                 toDo.append(new_path)  # Add the extended path to the stack
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.duplicates += sum(state in path for state in children)
+            stats.frontier(len(toDo))
 
     return ["Error: No path found"]
 
 
-# Example usage:
-start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
-
-result = DepthFirstSearch(start)
-
-# Print the result in a more organized way
-for state in result:
-    for row in state:
-        print(row)
-    print()  # Add an empty line between states
+def stateKey(state):
+    return tuple(map(tuple, state))  # Hashable copy of a board, used as transposition table key
+
+
+@instrumented
+def IterativeDeepeningSearch(s, board=None, heuristic=None, tableSize=65521, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # Depth-first search with a depth limit that grows until a goal is found, so the first solution is a
+    # shortest one while only the current path is kept. Every move changes the parity of the blank's distance
+    # from its home cell, so only limits of the right parity are tried.
+    # The transposition table remembers states whose subtree failed with some remaining depth; reaching them
+    # again with no more depth to spare is pointless, in this iteration and in all later ones. It has a fixed
+    # number of slots (tableSize, a prime spreads the keys best) and a colliding entry is only replaced by one
+    # with at least as much remaining depth, because those save the most work when they hit.
+    # An admissible heuristic (on packed states with a board, e.g. board.manhattan) is optional: the first limit
+    # starts at its estimate instead of 0 or 1, and children it proves too far from the goal are not entered.
+    if board:
+        goalTest, successors, keyOf = board.isGoal, board.nextStates, int
+        start = board.pack(s)
+        i, j = divmod(board.blank(start), board.n)
+    else:
+        goalTest, successors, keyOf = isGoal, nextStates, stateKey
+        start = s
+        i, j = find0(s)
+    keys = [None] * tableSize
+    depths = [0] * tableSize  # Remaining depth with which the state in the same slot of keys failed
+    path = [start]
+
+    def search(remaining):
+        current = path[-1]
+        if goalTest(current):
+            return True
+        if remaining == 0:
+            return False
+        children = successors(current)
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(path))
+        for state in children:
+            if len(path) > 1 and state == path[-2]:  # Never undo the move that led here
+                continue
+            key = keyOf(state)
+            slot = hash(key) % tableSize
+            if keys[slot] == key and depths[slot] >= remaining - 1:
+                if stats:
+                    stats.duplicates += 1
+                continue
+            if heuristic and heuristic(state) > remaining - 1:
+                continue
+            path.append(state)
+            if search(remaining - 1):
+                return True
+            path.pop()
+            if keys[slot] is None or keys[slot] == key or depths[slot] <= remaining - 1:
+                keys[slot], depths[slot] = key, remaining - 1
+        return False
+
+    # Manhattan-style estimates have the right parity too
+    first = limit = heuristic(start) if heuristic else (i + j) % 2
+    while not search(limit):
+        limit += 2
+    if stats:
+        stats.iterations += (limit - first) // 2 + 1
+    return [board.unpack(code) for code in path] if board else path
+
+
+if __name__ == "__main__":
+    # Example usage:
+    start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
+
+    board = PackedBoard(N)
+    result = IterativeDeepeningSearch(start, board, board.manhattan)  # Shortest path, on packed states
+    # IterativeDeepeningSearch(start) searches the lists without a heuristic, DepthFirstSearch(start) finds some path
+
+    # Print the result in a more organized way
+    for state in result:
+        for row in state:
+            print(row)
+        print()  # Add an empty line between states
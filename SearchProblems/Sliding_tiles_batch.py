@@ -0,0 +1,140 @@
+# Batch solver for files of sliding-tile instances.
+#
+# Instances are read from a JSONL file ({"id": ..., "board": [[...], ...]} per line, the board may also be flat)
+# or from a text file with one board per line as whitespace or comma separated tiles. They are solved on a
+# process pool and every result is written as one JSON line as soon as it is available. A line that is not a
+# board (a missing or repeated tile, a tile count that is not N * N) comes back with status "invalid" and the
+# reason in "error", so one bad line doesn't take down the rest of the batch:
+#
+#   python Sliding_tiles_batch.py instances.txt results.jsonl --workers 8 --time-limit 60 --node-limit 50000000
+
+import argparse
+import json
+import sys
+import time
+from math import isqrt
+from multiprocessing import Pool
+
+from Sliding_tiles_A_star import AStarSearchHeap, IDAStarSearch
+from Sliding_tiles_packed import IncrementalHeuristic, PackedBoard
+from Sliding_tiles_solvability import checkBoard, isSolvable
+
+SOLVERS = {'ida': IDAStarSearch, 'astar': AStarSearchHeap}
+
+
+class SearchLimit(Exception):
+    pass
+
+
+class LimitedHeuristic:
+    # Wraps an incremental heuristic; both solvers call expand once per expanded node, which makes it the
+    # place to count nodes and to enforce the per-instance limits
+    def __init__(self, heuristic, nodeLimit, deadline):
+        self.heuristic = heuristic
+        self.nodeLimit = nodeLimit
+        self.deadline = deadline
+        self.nodes = 0
+
+    def __call__(self, code):
+        return self.heuristic(code)
+
+    def expand(self, code, h):
+        if self.nodeLimit and self.nodes >= self.nodeLimit:
+            raise SearchLimit("node-limit")
+        self.nodes += 1
+        if self.deadline and self.nodes & 1023 == 0 and time.perf_counter() > self.deadline:
+            raise SearchLimit("time-limit")
+        return self.heuristic.expand(code, h)
+
+
+def readInstances(path):
+    """Stream (line number, line) for every instance line, skipping blank lines and '#' comments. The lines are
+    parsed by the workers, see parseInstance."""
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield number, line
+
+
+def parseInstance(number, line):
+    """The id and the tiles of one instance line, as given (rows or flat). Raises ValueError if the line cannot
+    be read."""
+    if not line.startswith('{'):
+        return number, [int(t) for t in line.replace(',', ' ').split()]
+    record = json.loads(line)  # json.JSONDecodeError is a ValueError
+    if not isinstance(record, dict) or 'board' not in record:
+        raise ValueError("a JSON line needs a \"board\"")
+    return record.get('id', number), record['board']
+
+
+def toBoard(tiles):
+    """The tiles as rows of an N x N board. Raises ValueError unless they are one, see checkBoard."""
+    if not isinstance(tiles, list) or not all(isinstance(t, (int, list)) for t in tiles):
+        raise ValueError("a board is a list of tiles or of rows of tiles")
+    if any(isinstance(row, list) and not all(isinstance(t, int) for t in row) for row in tiles):
+        raise ValueError("tiles must be integers")
+    flat = checkBoard(tiles)
+    n = isqrt(len(flat))
+    return [flat[i * n:(i + 1) * n] for i in range(n)]
+
+
+heuristics = {}  # One heuristic per board size and worker, its memo tables are reused across instances
+
+
+def solveInstance(job):
+    number, line, solver, timeLimit, nodeLimit = job
+    began = time.perf_counter()
+    name = number
+    try:
+        name, tiles = parseInstance(number, line)
+        start = toBoard(tiles)
+    except ValueError as error:
+        return {'id': name, 'status': 'invalid', 'error': str(error), 'length': None, 'nodes': 0,
+                'seconds': round(time.perf_counter() - began, 6)}
+    n = len(start)
+    result = {'id': name, 'n': n}
+    if not isSolvable(start):
+        result.update(status='unsolvable', length=None, nodes=0)
+    else:
+        if n not in heuristics:
+            board = PackedBoard(n)
+            heuristics[n] = (board, IncrementalHeuristic(board))
+        board, heuristic = heuristics[n]
+        limited = LimitedHeuristic(heuristic, nodeLimit, began + timeLimit if timeLimit else None)
+        try:
+            path = SOLVERS[solver](start, limited, board)
+            moves = [[tile for row in a for tile in row][[tile for row in b for tile in row].index(0)]
+                     for a, b in zip(path, path[1:])]  # The tile that slid into the blank at each step
+            result.update(status='solved', length=len(path) - 1, moves=moves)
+        except SearchLimit as limit:
+            result.update(status=str(limit), length=None)
+        result['nodes'] = limited.nodes
+    result['seconds'] = round(time.perf_counter() - began, 6)
+    return result
+
+
+def solveBatch(instances, output, workers=None, solver='ida', timeLimit=None, nodeLimit=None):
+    jobs = ((number, line, solver, timeLimit, nodeLimit) for number, line in instances)
+    with Pool(workers) as pool:
+        for result in pool.imap_unordered(solveInstance, jobs):
+            output.write(json.dumps(result) + '\n')
+            output.flush()  # Stream, so partial results survive an interrupted batch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a file of sliding-tile instances on a process pool")
+    parser.add_argument('instances', help="JSONL or text file with one board per line")
+    parser.add_argument('output', nargs='?', help="JSONL file for the results (default: stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--solver', choices=sorted(SOLVERS), default='ida')
+    parser.add_argument('--time-limit', type=float, default=None, help="seconds per instance")
+    parser.add_argument('--node-limit', type=int, default=None, help="expanded nodes per instance")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        solveBatch(readInstances(args.instances), output, args.workers, args.solver, args.time_limit, args.node_limit)
+    finally:
+        if output is not sys.stdout:
+            output.close()
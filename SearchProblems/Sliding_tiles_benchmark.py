@@ -0,0 +1,264 @@
+# Benchmark suite for the sliding-tile solvers, with a stored baseline to catch performance regressions.
+#
+# Three fixed instance sets, all generated from a seed so every run sees the same boards:
+#
+#   8-puzzle   random walks of 10 to 80 moves from the goal, two per length (graded depth)
+#   15-puzzle  random walks of 30 to 50 moves; --korf runs Korf's 100 instances instead, from
+#              Sliding_tiles_korf100.txt or --korf FILE (one per line, "number t0 t1 ... t15 [optimal length]" as
+#              in Korf 1985, blank = 0, the goal has the blank in the top left as here, '#' starts a comment).
+#              Most of them take IDA* far beyond the time limit in Python, and the stored baseline only holds
+#              the walks: run once with --korf --save-baseline to add the korf-N instances to it.
+#   24-puzzle  three random walks of 30 to 50 moves
+#
+# Every instance is solved by A* (AStarSearchHeap) and IDA* (IDAStarSearch) with each heuristic: Manhattan
+# distance, Manhattan plus linear conflicts, and the additive pattern database where one is at hand (the 8-puzzle
+# tables are built on the first run, the 15-puzzle 6-6-3 ones are used if buildPartition(4, '6-6-3', prefix)
+# was run once). The 8-puzzle suite also runs the solvers that only scale to small boards (BOUNDED): anytime
+# A*, the list-based A*, iterative deepening, bidirectional search and BFS. Nodes are the expanded count of
+# SearchStats, so they don't depend on the machine.
+#
+#   python Sliding_tiles_benchmark.py                      run and compare with Sliding_tiles_baseline.json
+#   python Sliding_tiles_benchmark.py --save-baseline      run and add the results to the baseline (replacing
+#                                                          the entries of the same instances)
+#
+# A run is flagged as a regression when a solution length or status changes, when it expands more nodes than
+# the baseline, or when it solves an instance with a known optimal length in more moves. The exit status is 1 if
+# any run was flagged, and 2 if there was nothing to compare with: no baseline file, or no run of this
+# invocation in it. Times are only advisory, as they depend on the machine and on what else runs on it: every
+# run first times a fixed workload (calibrate), the baseline stores that time, and the baseline times are scaled
+# by the ratio of the two before a solver and heuristic that take more than --tolerance (default 50%) longer over
+# a suite are reported as SLOWER.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from Search import randomWalk
+from Search_stats import SearchStats
+from Sliding_tiles_A_star import AnytimeSearch, AStarSearch, AStarSearchHeap, IDAStarSearch
+from Sliding_tiles_batch import SearchLimit
+from Sliding_tiles_DFS import IterativeDeepeningSearch
+from Sliding_tiles_packed import IncrementalHeuristic, PackedBoard
+from Sliding_tiles_pattern_db import PARTITIONS, AdditivePatternDatabase, buildPartition
+from Sliding_tiles_puzzle import BidirectionalSearch, BreadthFirstSearch
+
+SOLVERS = {'astar': AStarSearchHeap, 'ida': IDAStarSearch}
+# 8-puzzle only: solver called as solver(start, heuristic, board, stats=...), whether it takes a heuristic (if
+# not it runs once, as heuristic 'none'), and the longest walk it gets (None: all). BFS copies the path for every
+# node and the list-based A* re-sorts its open list for every expansion, both take minutes on the 60-move walks.
+BOUNDED = {'anytime': (lambda start, heuristic, board, stats:
+                       AnytimeSearch(start, heuristic, board, budget=float('inf'), stats=stats), True, None),
+           'astar-list': (AStarSearch, True, 40),
+           'iddfs': (lambda start, heuristic, board, stats:
+                     IterativeDeepeningSearch(start, board, heuristic, stats=stats), True, None),
+           'bidirectional': (lambda start, heuristic, board, stats:
+                             BidirectionalSearch(start, board, stats=stats), False, None),
+           'bfs': (lambda start, heuristic, board, stats: BreadthFirstSearch(start, board, stats=stats), False, 40)}
+SUITES = {'8-puzzle': (3, (10, 20, 30, 40, 60, 80), 2),  # Board size, walk lengths, instances per length
+          '15-puzzle': (4, (30, 35, 40, 45, 50), 2),
+          '24-puzzle': (5, (30, 40, 50), 1)}
+PATTERNS = {3: '4-4', 4: '6-6-3'}  # Partition used for the pattern database heuristic
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sliding_tiles_baseline.json')
+KORF = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Sliding_tiles_korf100.txt')
+CALIBRATION = 'calibration'  # Baseline key of the calibration time, see calibrate
+
+
+class LimitedStats(SearchStats):
+    # Ends a run with SearchLimit("time-limit") once its deadline has passed. Every solver records its frontier
+    # for each expanded node (each layer for bidirectional search), so that is where the clock is read.
+    def __init__(self, deadline):
+        super().__init__(traceMemory=False)
+        self.deadline = deadline
+
+    def frontier(self, size):
+        super().frontier(size)
+        if self.deadline and time.perf_counter() > self.deadline:
+            raise SearchLimit("time-limit")
+
+
+def readKorf(path):
+    # (name, board, optimal length or None) for every instance line
+    with open(path) as f:
+        for line in f:
+            numbers = [int(t) for t in line.split('#')[0].split()]
+            if len(numbers) in (17, 18):
+                if sorted(numbers[1:17]) != list(range(16)):
+                    raise ValueError(f"{path}: instance {numbers[0]} is not a 15-puzzle board")
+                yield (f"korf-{numbers[0]}", [numbers[1 + 4 * i:5 + 4 * i] for i in range(4)],
+                       numbers[17] if len(numbers) == 18 else None)
+
+
+def instances(suite, seed=0, korf=None):
+    if suite == '15-puzzle' and korf:
+        boards = list(readKorf(korf))
+        if not boards:
+            raise ValueError(f"{korf}: no instances found (expected lines of 17 or 18 numbers)")
+        return boards
+    n, walks, perWalk = SUITES[suite]
+    rng = random.Random(f"{suite}-{seed}")  # One stream per suite, so adding a suite never changes the others
+    board = PackedBoard(n)
+    return [(f"walk{steps}-{k}", randomWalk(board, steps, rng), None) for steps in walks for k in range(perWalk)]
+
+
+def calibrate(repeat=5):
+    """Seconds this machine takes, right now, for a fixed search: the median of repeat IDA* solves of a 28-move
+    8-puzzle board with the Manhattan distance, about 0.1 s each. The baseline times are scaled by it."""
+    board = PackedBoard(3)
+    heuristic = IncrementalHeuristic(board, linearConflict=False)
+    start = [[6, 7, 8], [3, 1, 5], [4, 2, 0]]
+    times = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        IDAStarSearch(start, heuristic, board)
+        times.append(time.perf_counter() - began)
+    return statistics.median(times)
+
+
+def heuristics(n, board, pdbPrefix):
+    result = {'manhattan': IncrementalHeuristic(board, linearConflict=False),
+              'linear': IncrementalHeuristic(board)}
+    if n in PATTERNS:
+        paths = [f"{pdbPrefix}-{n}-{'_'.join(map(str, tiles))}.pdb" for tiles in PARTITIONS[(n, PATTERNS[n])]]
+        if n == 3 and not all(map(os.path.exists, paths)):
+            paths = buildPartition(n, PATTERNS[n], pdbPrefix)  # A few seconds, then cached on disk
+        if all(map(os.path.exists, paths)):
+            result['pdb'] = AdditivePatternDatabase(paths, board)
+    return result
+
+
+def runs(suite, n, board, pdbPrefix):
+    # (solver name, solver, heuristic name, heuristic, longest walk) for every run of a suite
+    named = heuristics(n, board, pdbPrefix)
+    for solverName, solver in SOLVERS.items():
+        for heuristicName, heuristic in named.items():
+            yield solverName, solver, heuristicName, heuristic, None
+    if suite == '8-puzzle':
+        for solverName, (solver, informed, longest) in BOUNDED.items():
+            for heuristicName, heuristic in named.items() if informed else [('none', None)]:
+                yield solverName, solver, heuristicName, heuristic, longest
+
+
+def run(suites, seed=0, korf=None, timeLimit=60, pdbPrefix='pdb', output=None):
+    results = {}
+    for suite in suites:
+        n = SUITES[suite][0]
+        board = PackedBoard(n)
+        boards = instances(suite, seed, korf)
+        for solverName, solver, heuristicName, heuristic, longest in runs(suite, n, board, pdbPrefix):
+            for name, start, optimal in boards:
+                if longest and int(name[4:].split('-')[0]) > longest:  # walk<steps>-<k>
+                    continue
+                began = time.perf_counter()
+                stats = LimitedStats(began + timeLimit if timeLimit else None)
+                try:
+                    path = solver(start, heuristic, board, stats=stats)
+                    status, length = 'solved', len(path) - 1
+                except SearchLimit as limit:
+                    status, length = str(limit), None
+                seconds = time.perf_counter() - began
+                result = {'suite': suite, 'id': name, 'solver': solverName, 'heuristic': heuristicName,
+                          'status': status, 'length': length, 'nodes': stats.expanded,
+                          'seconds': round(seconds, 6)}
+                if optimal is not None:
+                    result['optimal'] = optimal
+                results[f"{suite}/{name}/{solverName}/{heuristicName}"] = result
+                if output:
+                    output.write(json.dumps(result) + '\n')
+    return results
+
+
+def summarize(results):
+    groups = {}
+    for result in results.values():
+        groups.setdefault((result['suite'], result['solver'], result['heuristic']), []).append(result)
+    for (suite, solver, heuristic), group in groups.items():
+        solved = [r for r in group if r['status'] == 'solved']
+        nodes = sum(r['nodes'] for r in group)
+        seconds = sum(r['seconds'] for r in group)
+        median = statistics.median(r['seconds'] for r in solved) if solved else float('nan')
+        print(f"{suite:10} {solver:13} {heuristic:10} solved {len(solved):3}/{len(group):<3} "
+              f"{nodes:>11} nodes {nodes / seconds if seconds else 0:>9.0f} nodes/s "
+              f"median {median * 1000:9.1f} ms  total {seconds:8.2f} s")
+
+
+def compare(results, baseline, tolerance=0.5, scale=1.0):
+    """The runs that got worse than the baseline and the solvers that got slower, as two lists of printable
+    lines. Lengths, statuses and nodes are compared per instance; time per solver and heuristic over the whole
+    suite, single short runs are too noisy. scale is this machine's calibration time over the baseline's."""
+    flagged, slower = [], []
+    now, before = {}, {}
+    for key, result in results.items():
+        if result['status'] == 'solved' and result['length'] > result.get('optimal', result['length']):
+            flagged.append(f"{key}: {result['length']} moves, the optimum is {result['optimal']}")
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if (result['status'], result['length']) != (base['status'], base['length']):
+            flagged.append(f"{key}: {base['status']} {base['length']} -> {result['status']} {result['length']}")
+        elif result['nodes'] > base['nodes'] and result['status'] == 'solved':
+            flagged.append(f"{key}: {base['nodes']} -> {result['nodes']} nodes")
+        group = f"{result['suite']}/{result['solver']}/{result['heuristic']}"
+        now[group] = now.get(group, 0) + result['seconds']
+        before[group] = before.get(group, 0) + base['seconds'] * scale
+    for group in now:
+        if now[group] > before[group] * (1 + tolerance) and now[group] > 0.1:
+            slower.append(f"{group}: {before[group]:.3f} s (calibrated) -> {now[group]:.3f} s")
+    return flagged, slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sliding-tile solvers against a stored baseline")
+    parser.add_argument('--suite', action='append', choices=sorted(SUITES), help="suite to run (default: all)")
+    parser.add_argument('--korf', nargs='?', const=KORF,
+                        help="run Korf's 100 15-puzzle instances instead of the walks (default file: %(const)s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-limit', type=float, default=60, help="seconds per solver run")
+    parser.add_argument('--pdb-prefix', default='pdb', help="file prefix of the pattern databases")
+    parser.add_argument('--baseline', default=BASELINE, help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="calibrated slowdown reported as SLOWER")
+    parser.add_argument('--output', help="also write every run as a JSON line to this file")
+    args = parser.parse_args()
+
+    calibration = calibrate()
+    output = open(args.output, 'w') if args.output else None
+    try:
+        results = run(args.suite or list(SUITES), args.seed, args.korf, args.time_limit, args.pdb_prefix, output)
+    finally:
+        if output:
+            output.close()
+    summarize(results)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        baseline[CALIBRATION] = round(calibration, 6)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"{len(results)} runs saved to {args.baseline}")
+        sys.exit(0)
+
+    missing = [key for key in results if key not in baseline]
+    if len(missing) == len(results):
+        print(f"NOTHING COMPARED: none of the {len(results)} runs is in {args.baseline}, "
+              f"run once with --save-baseline to add them", file=sys.stderr)
+        sys.exit(2)
+    if missing:
+        print(f"{len(missing)} of {len(results)} runs are not in the baseline and were not compared, "
+              f"e.g. {missing[0]}")
+    scale = calibration / baseline[CALIBRATION] if CALIBRATION in baseline else 1.0
+    flagged, slower = compare(results, baseline, args.tolerance, scale)
+    for line in slower:
+        print("SLOWER", line)
+    for line in flagged:
+        print("REGRESSION", line)
+    print(f"{len(flagged)} regressions in {len(results) - len(missing)} runs against {args.baseline}, "
+          f"{len(slower)} solvers slower (calibration {calibration:.3f} s, {scale:.2f}x the baseline's)")
+    sys.exit(1 if flagged else 0)
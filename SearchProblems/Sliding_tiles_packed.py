@@ -0,0 +1,155 @@
+# Packed integer encoding of sliding-tile boards.
+#
+# A board is stored as one Python int: every cell gets a fixed number of bits (4 bits per tile, which is
+# enough up to the 15-puzzle, 5 bits for the 24-puzzle), cell p lives at bit offset p * bits, and the index
+# of the blank cell is kept in the bits above the last cell. States are therefore hashable, compare in one
+# step, and a successor is a handful of shifts instead of a deep copy plus an O(N^2) search for the 0.
+#
+# The goal is the same as isGoal in the list based solvers: tile t belongs at cell t, the blank at cell 0.
+
+
+class PackedBoard:
+    def __init__(self, n):
+        self.n = n
+        self.cells = n * n
+        self.bits = max(4, (self.cells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.blankShift = self.bits * self.cells  # The blank index is stored above the tiles
+        self.boardMask = (1 << self.blankShift) - 1
+        self.shift = [p * self.bits for p in range(self.cells)]
+
+        # Neighbour table: the cells the blank can swap with, in the order Up, Down, Left, Right
+        self.neighbours = []
+        for p in range(self.cells):
+            i, j = divmod(p, n)
+            around = [(i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)]
+            self.neighbours.append(tuple(r * n + c for r, c in around if 0 <= r < n and 0 <= c < n))
+
+        # Manhattan distance of every tile from every cell, looked up instead of recomputed
+        self.distance = [[0] * self.cells for _ in range(self.cells)]
+        for tile in range(1, self.cells):
+            goal_row, goal_col = divmod(tile, n)
+            for p in range(self.cells):
+                i, j = divmod(p, n)
+                self.distance[tile][p] = abs(i - goal_row) + abs(j - goal_col)
+
+        self.goal = self.pack([[i * n + j for j in range(n)] for i in range(n)])
+
+    def pack(self, state):
+        code = 0
+        for p, tile in enumerate(tile for row in state for tile in row):
+            code |= tile << self.shift[p]
+            if tile == 0:
+                blank = p
+        return code | (blank << self.blankShift)
+
+    def unpack(self, code):
+        tiles = [(code >> self.shift[p]) & self.mask for p in range(self.cells)]
+        return [tiles[i * self.n:(i + 1) * self.n] for i in range(self.n)]
+
+    def blank(self, code):
+        return code >> self.blankShift
+
+    def tileAt(self, code, p):
+        return (code >> self.shift[p]) & self.mask
+
+    def isGoal(self, code):
+        return code == self.goal
+
+    def move(self, code, q):
+        # Slide the tile at cell q into the blank; the blank ends up at q
+        blank = code >> self.blankShift
+        board = code & self.boardMask
+        tile = (board >> self.shift[q]) & self.mask
+        board += (tile << self.shift[blank]) - (tile << self.shift[q])
+        return board | (q << self.blankShift)
+
+    def nextStates(self, code):
+        blank = code >> self.blankShift
+        board = code & self.boardMask
+        mask, shift, blankShift = self.mask, self.shift, self.blankShift
+        result = []
+        for q in self.neighbours[blank]:
+            tile = (board >> shift[q]) & mask
+            result.append((board + (tile << shift[blank]) - (tile << shift[q])) | (q << blankShift))
+        return result
+
+    def manhattan(self, code):
+        distance = 0
+        for p in range(self.cells):
+            tile = (code >> self.shift[p]) & self.mask
+            if tile != 0:
+                distance += self.distance[tile][p]
+        return distance
+
+
+def longestIncreasing(values):
+    best = []
+    for i, v in enumerate(values):
+        best.append(1 + max([best[k] for k in range(i) if values[k] < v], default=0))
+    return max(best, default=0)
+
+
+class IncrementalHeuristic:
+    # Manhattan distance, optionally with linear conflicts, carried along with every search node.
+    # A move displaces a single tile, so the child's value is the parent's plus the change of that tile's
+    # distance and, for linear conflicts, of the two lines the tile left and entered. Line costs are memoised
+    # on the line contents, which makes every successor O(1) instead of a rescan of all N^2 cells.
+    # The solvers use expand(code, h) instead of nextStates whenever the heuristic provides it.
+
+    def __init__(self, board, linearConflict=True):
+        self.board = board
+        self.linearConflict = linearConflict
+        self.rowMask = (1 << (board.bits * board.n)) - 1
+        self.rowCosts = {}
+        self.columnCosts = {}
+
+    def lineCost(self, tiles, line, axis):
+        # Tiles that belong in this line but are in reversed order: all but the longest increasing run of
+        # them have to leave the line and come back, two extra moves each
+        n = self.board.n
+        goals = [divmod(t, n)[1 - axis] for t in tiles if t != 0 and divmod(t, n)[axis] == line]
+        return 2 * (len(goals) - longestIncreasing(goals))
+
+    def rowCost(self, code, row):
+        board = self.board
+        bits = (code >> board.shift[row * board.n]) & self.rowMask
+        cost = self.rowCosts.get((row, bits))
+        if cost is None:
+            tiles = [(bits >> (j * board.bits)) & board.mask for j in range(board.n)]
+            cost = self.rowCosts[(row, bits)] = self.lineCost(tiles, row, 0)
+        return cost
+
+    def columnCost(self, code, column):
+        board = self.board
+        tiles = tuple((code >> board.shift[i * board.n + column]) & board.mask for i in range(board.n))
+        cost = self.columnCosts.get((column, tiles))
+        if cost is None:
+            cost = self.columnCosts[(column, tiles)] = self.lineCost(tiles, column, 1)
+        return cost
+
+    def __call__(self, code):
+        h = self.board.manhattan(code)
+        if self.linearConflict:
+            for line in range(self.board.n):
+                h += self.rowCost(code, line) + self.columnCost(code, line)
+        return h
+
+    def expand(self, code, h):
+        board = self.board
+        n = board.n
+        blank = code >> board.blankShift
+        result = []
+        for child in board.nextStates(code):
+            q = child >> board.blankShift  # The moved tile came from the child's blank cell
+            tile = board.tileAt(code, q)
+            childH = h + board.distance[tile][blank] - board.distance[tile][q]
+            if self.linearConflict:
+                if q // n == blank // n:  # Horizontal move: the tile changed column
+                    for column in (q % n, blank % n):
+                        childH += self.columnCost(child, column) - self.columnCost(code, column)
+                else:  # Vertical move: the tile changed row
+                    for row in (q // n, blank // n):
+                        childH += self.rowCost(child, row) - self.rowCost(code, row)
+            result.append((child, childH))
+        return result
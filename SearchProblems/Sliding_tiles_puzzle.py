@@ -1,5 +1,8 @@
 from collections import deque
 
+from Search_stats import instrumented
+from Sliding_tiles_solvability import Unsolvable, isSolvable
+
 N = 3  # You can change N to the desired puzzle size
 
 
@@ -55,34 +58,107 @@ def nextStates(state):
     return result
 
 
-def BreadthFirstSearch(s):
-    toDo = deque([[s]])  # Initialize a queue of paths to explore
+@instrumented
+def BreadthFirstSearch(s, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # With a PackedBoard the search runs on packed integer states and unpacks the path at the end
+    goalTest, successors = (board.isGoal, board.nextStates) if board else (isGoal, nextStates)
+    toDo = deque([[board.pack(s) if board else s]])  # Initialize a queue of paths to explore
 
     while toDo:
         path = toDo.popleft()  # Pop the first path from the queue
         current = path[-1]  # Get the last node on the path
 
-        if isGoal(current):  # If the current state is the goal, return the path
-            return path
+        if goalTest(current):  # If the current state is the goal, return the path
+            return [board.unpack(code) for code in path] if board else path
 
-        for state in nextStates(current):  # Generate successor states
-            if state not in [p[-1] for p in path]:  # Check if the state is not previously explored
+        children = successors(current)  # Generate successor states
+        for state in children:
+            if state not in path:  # Check if the state is not already on this path
                 new_path = list(path)
                 new_path.append(state)
                 toDo.append(new_path)  # Add the extended path to the queue
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.duplicates += sum(state in path for state in children)
+            stats.frontier(len(toDo))
 
     return ["Error: No path found"]
 
 
-start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
-
-result = BreadthFirstSearch(start)
-
-# Print the result in a more organized way
-for state in result:
-    for row in state:
-        print(row)
-    print()  # Add an empty line between states
+def stateKey(state):
+    return tuple(map(tuple, state))  # Hashable copy of a board, used as dictionary key
+
+
+@instrumented
+def BidirectionalSearch(s, board=None, stats=None):
+    if not isSolvable(s):
+        return Unsolvable(s)
+    # Breadth-first from the start and from the goal at the same time, one whole layer of the smaller side
+    # at a time. Both sides keep a visited map with parent pointers instead of a copy of the path per node,
+    # and the path is stitched together where the two searches meet. Moves are reversible, so the backward
+    # search uses the same successor function.
+    if board:
+        start, goal, successors, keyOf, toBoard = board.pack(s), board.goal, board.nextStates, int, board.unpack
+    else:
+        start, goal, successors, keyOf = s, [[i * N + j for j in range(N)] for i in range(N)], nextStates, stateKey
+        toBoard = lambda key: [list(row) for row in key]
+    parents = ({keyOf(start): None}, {keyOf(goal): None})
+    frontiers = ([start], [goal])
+
+    def chain(parent, key):  # Keys from a meeting point back to the side's root
+        keys = []
+        while key is not None:
+            keys.append(key)
+            key = parent[key]
+        return keys
+
+    meetings = [keyOf(start)] if keyOf(start) in parents[1] else []
+    while not meetings and frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1  # Grow the smaller frontier
+        mine, other = parents[side], parents[1 - side]
+        layer = []
+        for current in frontiers[side]:
+            key = keyOf(current)
+            children = successors(current)
+            for state in children:
+                childKey = keyOf(state)
+                if childKey not in mine:
+                    mine[childKey] = key
+                    layer.append(state)
+                    if childKey in other:
+                        meetings.append(childKey)
+                elif stats:
+                    stats.duplicates += 1
+            if stats:
+                stats.expanded += 1
+                stats.generated += len(children)
+        frontiers[side][:] = layer
+        if stats:
+            stats.frontier(len(frontiers[0]) + len(frontiers[1]))
+
+    if not meetings:
+        return ["Error: No path found"]
+    # Every meeting point in the last layer is equally far from its own side, pick the one closest to the other
+    meet = min(meetings, key=lambda key: len(chain(parents[0], key)) + len(chain(parents[1], key)))
+    keys = chain(parents[0], meet)[::-1] + chain(parents[1], meet)[1:]
+    return [toBoard(key) for key in keys]
+
+
+if __name__ == "__main__":
+    # Example usage:
+    start = [[1, 2, 5], [3, 7, 4], [0, 6, 8]]  # Initial state
+
+    result = BreadthFirstSearch(start)  # BreadthFirstSearch(start, PackedBoard(N)) searches on packed states
+    # BidirectionalSearch(start) finds a path of the same length while visiting far fewer states
+
+    # Print the result in a more organized way
+    for state in result:
+        for row in state:
+            print(row)
+        print()  # Add an empty line between states
 
 
 # To print a list containing lists of lists, we can use the following replacement for lines 77-85:
@@ -0,0 +1,69 @@
+# Solvability oracle for the sliding-tile puzzles.
+#
+# Every move swaps the blank with a neighbour: one transposition of the board permutation, and one step of
+# the blank. A board can therefore only reach a goal if the permutation that turns the goal into the board
+# has the same parity as the Manhattan distance the blank has to travel. That is the classic inversion rule
+# for odd and even N alike, and it holds for any goal layout, not only the sorted one.
+#
+# Half of all boards fail it, and a search would only find that out after exhausting the whole reachable half
+# of the state space. So every solver checks isSolvable before searching and returns Unsolvable instead. A
+# board that is not a board at all (wrong tile count, a missing or repeated tile) raises ValueError.
+
+from math import isqrt
+
+
+class Unsolvable(list):
+    # Returned by the solvers instead of a path, so callers can tell "impossible" from "gave up"
+    def __init__(self, state):
+        super().__init__(["Error: Start state cannot reach the goal"])
+        self.state = state
+
+
+def flatten(state):
+    return [tile for row in state for tile in row] if isinstance(state[0], (list, tuple)) else list(state)
+
+
+def permutationParity(tiles):
+    # Parity of a permutation of 0..len-1 from its cycle decomposition, O(N^2) cells
+    seen = [False] * len(tiles)
+    parity = 0
+    for i in range(len(tiles)):
+        length = 0
+        while not seen[i]:
+            seen[i] = True
+            i = tiles[i]
+            length += 1
+        if length:
+            parity ^= (length - 1) & 1
+    return parity
+
+
+def checkBoard(state):
+    """The tiles of an N x N board (rows or flat) as a flat list. Raises ValueError unless it holds every tile
+    0..N*N-1 exactly once, in rows of N."""
+    if not state:
+        raise ValueError("empty board")
+    tiles = flatten(state)
+    n = isqrt(len(tiles))
+    if n < 2 or n * n != len(tiles):
+        raise ValueError(f"{len(tiles)} tiles do not make an N x N board")
+    if isinstance(state[0], (list, tuple)) and (len(state) != n or any(len(row) != n for row in state)):
+        raise ValueError(f"the rows of a {n}x{n} board must hold {n} tiles each")
+    if sorted(tiles) != list(range(n * n)):
+        raise ValueError(f"the tiles must be 0..{n * n - 1}, each exactly once")
+    return tiles
+
+
+def isSolvable(state, goal=None):
+    tiles = checkBoard(state)
+    n = isqrt(len(tiles))
+    goalTiles = checkBoard(goal) if goal is not None else list(range(n * n))
+    if len(goalTiles) != len(tiles):
+        raise ValueError(f"a {n}x{n} board cannot reach a goal of {len(goalTiles)} tiles")
+    where = [0] * len(tiles)
+    for p, tile in enumerate(goalTiles):
+        where[tile] = p
+    relative = [where[tile] for tile in tiles]  # Board written in terms of goal cells
+    blankRow, blankCol = divmod(tiles.index(0), n)
+    goalRow, goalCol = divmod(goalTiles.index(0), n)
+    return permutationParity(relative) == (abs(blankRow - goalRow) + abs(blankCol - goalCol)) & 1
@@ -1,21 +1,101 @@
+import random
+import time
+from math import isqrt
+
+from Search_stats import instrumented
+
 def is_goal(state):
     """Check if we've totally solved the Sudoku puzzle (no more '0's left)."""
     return all(0 not in row for row in state)
 
+class SudokuState:
+    """A grid that also remembers which digits each row, column and box already holds.
+
+    The digits are kept as bitmasks (bit n - 1 for digit n) and updated on every fill, so checking whether a
+    digit is allowed is a single bit test instead of scanning a row, a column and a box. The state behaves like
+    the plain list of lists (indexing, iterating over rows, comparing), so is_goal, the heuristic and printing
+    work on it unchanged.
+    """
+
+    def __init__(self, grid, rows=None, cols=None, boxes=None):
+        self.grid = grid
+        self.size = len(grid)
+        self.box = isqrt(self.size)
+        if rows is None:
+            rows, cols, boxes = [0] * self.size, [0] * self.size, [0] * self.size
+            for i in range(self.size):
+                for j in range(self.size):
+                    if grid[i][j]:
+                        bit = 1 << (grid[i][j] - 1)
+                        rows[i] |= bit
+                        cols[j] |= bit
+                        boxes[self.box_of(i, j)] |= bit
+        self.rows, self.cols, self.boxes = rows, cols, boxes
+
+    def __getitem__(self, i):
+        return self.grid[i]
+
+    def __iter__(self):
+        return iter(self.grid)
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        return self.grid == (other.grid if isinstance(other, SudokuState) else other)
+
+    def __hash__(self):
+        return hash(tuple(map(tuple, self.grid)))
+
+    def box_of(self, i, j):
+        return (i // self.box) * self.box + j // self.box
+
+    def candidates(self, i, j):
+        """Bitmask of the digits that still fit in cell (i, j)."""
+        return ((1 << self.size) - 1) & ~(self.rows[i] | self.cols[j] | self.boxes[self.box_of(i, j)])
+
+    def allowed(self, i, j, n):
+        return self.candidates(i, j) >> (n - 1) & 1 == 1
+
+    def fill(self, i, j, n):
+        """Place n in (i, j). Only the changed row is copied, the other rows are shared with the parent state."""
+        grid = list(self.grid)
+        grid[i] = grid[i][:]
+        grid[i][j] = n
+        bit = 1 << (n - 1)
+        rows, cols, boxes = self.rows[:], self.cols[:], self.boxes[:]
+        rows[i] |= bit
+        cols[j] |= bit
+        boxes[self.box_of(i, j)] |= bit
+        return SudokuState(grid, rows, cols, boxes)
+
+    def most_constrained_cell(self):
+        """The empty cell with the fewest digits left (minimum remaining values), or None if the grid is full."""
+        best, fewest = None, self.size + 1
+        for i in range(self.size):
+            for j in range(self.size):
+                if self.grid[i][j] == 0:
+                    left = self.candidates(i, j).bit_count()
+                    if left < fewest:
+                        best, fewest = (i, j), left
+                        if left <= 1:
+                            return best
+        return best
+
 def next_states(state):
-    """Let's see what we can do next in our Sudoku adventure."""
-    i, j = find_empty_cell(state)
-    extensions = []
-    for n in range(1, 10):
-        if allowed(state, i, j, n):
-            new_state = fill(state, i, j, n)
-            extensions.append(new_state)
-    return extensions
+    """Let's see what we can do next in our Sudoku adventure: branch on the cell with the fewest options."""
+    if not isinstance(state, SudokuState):
+        state = SudokuState(state)
+    cell = state.most_constrained_cell()
+    if cell is None:
+        return []
+    i, j = cell
+    return [state.fill(i, j, n) for n in range(1, state.size + 1) if state.allowed(i, j, n)]
 
 def find_empty_cell(state):
     """Hunting for empty cells in the Sudoku grid. Any out there?"""
-    for i in range(9):
-        for j in range(9):
+    for i in range(len(state)):
+        for j in range(len(state)):
             if state[i][j] == 0:
                 return i, j
     return None, None
@@ -34,13 +114,14 @@ def in_row(state, i, n):
 
 def in_column(state, j, n):
     """Checking if number 'n' is already in the same column as cell (i, j)."""
-    return n in [state[i][j] for i in range(9)]
+    return any(row[j] == n for row in state)
 
 def in_square(state, i, j, n):
-    """Digging into the 3x3 square to find if number 'n' is already there."""
-    start_row, start_col = 3 * (i // 3), 3 * (j // 3)
-    for row in range(start_row, start_row + 3):
-        for col in range(start_col, start_col + 3):
+    """Digging into the box (3x3 on a 9x9 grid, 4x4 on 16x16, ...) to find if number 'n' is already there."""
+    box = isqrt(len(state))
+    start_row, start_col = box * (i // box), box * (j // box)
+    for row in range(start_row, start_row + box):
+        for col in range(start_col, start_col + box):
             if state[row][col] == n:
                 return True
     return False
@@ -51,9 +132,12 @@ def fill(state, i, j, n):
     new_state[i][j] = n
     return new_state
 
-def a_star_search(initial_state, heuristic):
-    """We're on an adventure to solve Sudoku using the A* search method."""
+@instrumented
+def a_star_search(initial_state, heuristic, stats=None):
+    """We're on an adventure to solve Sudoku using the A* search method. Pass stats=SearchStats() to count the steps."""
     to_do = [[initial_state]]  # Starting with a list of paths to explore
+    if stats:
+        heuristic = stats.timed(heuristic)
 
     while to_do:
         to_do.sort(key=lambda path: heuristic(path))  # Sorting paths by our chosen heuristic
@@ -65,10 +149,17 @@ def a_star_search(initial_state, heuristic):
         if is_goal(current):  # Is this the destination we've been searching for?
             return path
 
-        for state in next_states(current):
+        children = next_states(current)
+        for state in children:
             if not any(state == p for p in path) and not any(state == p[-1] for p in to_do):
                 new_path = path + [state]
                 to_do.append(new_path)
+            elif stats:
+                stats.duplicates += 1  # Been there already, no need to go again
+        if stats:
+            stats.expanded += 1
+            stats.generated += len(children)
+            stats.frontier(len(to_do))
 
     return "FAILURE: NO PATH FOUND"
 
@@ -78,25 +169,381 @@ def heuristic(path):
     # For simplicity, we're counting empty cells as our guide.
     return sum(row.count(0) for row in path[-1])
 
-# Our starting point, the unsolved Sudoku puzzle in a list of lists.
-grid = [
-    [5, 3, 0, 0, 7, 0, 0, 0, 0],
-    [6, 0, 0, 1, 9, 5, 0, 0, 0],
-    [0, 9, 8, 0, 0, 0, 0, 6, 0],
-    [8, 0, 0, 0, 6, 0, 0, 0, 3],
-    [4, 0, 0, 8, 0, 3, 0, 0, 1],
-    [7, 0, 0, 0, 2, 0, 0, 0, 6],
-    [0, 6, 0, 0, 0, 0, 2, 8, 0],
-    [0, 0, 0, 4, 1, 9, 0, 0, 5],
-    [0, 0, 0, 0, 8, 0, 0, 0, 0]
-]
-
-# Time to set off on our Sudoku-solving adventure using A* search and our chosen heuristic.
-solution = a_star_search(grid, heuristic)
-
-# Did we make it to the treasure? Let's find out.
-if solution == "FAILURE: NO PATH FOUND":
-    print("Uh-oh, no solution found. Keep exploring!")
-else:
-    for row in solution[-1]:
-        print(row)
+# The A* search above is nice to follow step by step, but it is far too slow for hard puzzles.
+# The constraint solver below keeps the candidates of every cell as bitmasks (bit n - 1 set means digit n is
+# still possible), fills in everything that naked and hidden singles force, strikes out locked candidates, and
+# hands whatever is left to an exact-cover search (Knuth's Algorithm X, with dictionaries of sets standing in for
+# the dancing links). That search is restarted with a growing node budget, see restarted_solutions.
+
+def sudoku_units(size):
+    """All rows, columns and boxes of a size x size grid as lists of cells, built once per size."""
+    if size not in UNITS:
+        box = isqrt(size)
+        UNITS[size] = ([[(i, j) for j in range(size)] for i in range(size)] +
+                       [[(i, j) for i in range(size)] for j in range(size)] +
+                       [[(r + k // box, c + k % box) for k in range(size)]
+                        for r in range(0, size, box) for c in range(0, size, box)])
+    return UNITS[size]
+
+UNITS = {}
+
+def sudoku_peers(size):
+    """For every cell, the other cells that share a row, column or box with it, built once per size."""
+    if size not in PEERS:
+        peers = [[set() for _ in range(size)] for _ in range(size)]
+        for unit in sudoku_units(size):
+            for i, j in unit:
+                peers[i][j].update(unit)
+        for i in range(size):
+            for j in range(size):
+                peers[i][j].discard((i, j))
+        PEERS[size] = [[sorted(cells) for cells in row] for row in peers]
+    return PEERS[size]
+
+PEERS = {}
+
+def sudoku_intersections(size):
+    """Every place where a box meets a row or column: (the shared cells, the rest of the line, the rest of the box)."""
+    if size not in INTERSECTIONS:
+        box = isqrt(size)
+        result = []
+        for r in range(0, size, box):
+            for c in range(0, size, box):
+                inside = {(r + k // box, c + k % box) for k in range(size)}
+                for k in range(box):
+                    for line in ([(r + k, j) for j in range(size)], [(i, c + k) for i in range(size)]):
+                        shared = [cell for cell in line if cell in inside]
+                        result.append((shared, [cell for cell in line if cell not in inside],
+                                       sorted(inside.difference(shared))))
+        INTERSECTIONS[size] = result
+    return INTERSECTIONS[size]
+
+INTERSECTIONS = {}
+
+def propagate(grid):
+    """Fill in every cell that naked and hidden singles force. Returns the new grid, or None if some cell or digit
+    has no place left."""
+    reduced = reduce(grid, locked=False)
+    return reduced and reduced[0]
+
+def reduce(grid, locked=True):
+    """Fill in the forced cells of grid and strike out the digits that cannot go anywhere any more.
+
+    Returns (grid, candidates) as new lists, candidates holding the bitmask of every cell still empty (0 for the
+    filled ones), or None on a contradiction. With locked, a digit that a box only allows where it meets a row or
+    column is struck from the rest of that line, and the other way round (pointing and claiming); without it only
+    singles are used.
+    """
+    size = len(grid)
+    box = isqrt(size)
+    full = (1 << size) - 1
+    grid = [row[:] for row in grid]
+    rows, cols, boxes = [0] * size, [0] * size, [0] * size
+    for i in range(size):
+        for j in range(size):
+            if grid[i][j]:
+                bit = 1 << (grid[i][j] - 1)
+                b = (i // box) * box + j // box
+                if (rows[i] | cols[j] | boxes[b]) & bit:
+                    return None  # The clues already clash
+                rows[i] |= bit
+                cols[j] |= bit
+                boxes[b] |= bit
+    candidates = [[0 if grid[i][j] else full & ~(rows[i] | cols[j] | boxes[(i // box) * box + j // box])
+                   for j in range(size)] for i in range(size)]
+    peers = sudoku_peers(size)
+
+    def place(i, j, bit):
+        grid[i][j] = n = bit.bit_length()
+        candidates[i][j] = 0
+        for pi, pj in peers[i][j]:
+            if candidates[pi][pj] & bit:
+                candidates[pi][pj] ^= bit
+                if candidates[pi][pj] == 0:
+                    return False  # Nothing fits there any more
+            elif grid[pi][pj] == n:
+                return False
+        return True
+
+    def strike(cells, mask):
+        for i, j in cells:
+            if candidates[i][j] & mask:
+                candidates[i][j] &= ~mask
+                if candidates[i][j] == 0:
+                    return False
+        return True
+
+    units = sudoku_units(size)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(size):
+            for j in range(size):
+                mask = candidates[i][j]
+                if mask and mask & (mask - 1) == 0:  # Naked single: only one digit left for this cell
+                    if not place(i, j, mask):
+                        return None
+                    changed = True
+        if changed:
+            continue
+        for unit in units:  # Hidden single: a digit that fits in only one cell of a row, column or box
+            once = twice = placed = 0
+            for i, j in unit:
+                mask = candidates[i][j]
+                twice |= once & mask
+                once |= mask
+                if grid[i][j]:
+                    placed |= 1 << (grid[i][j] - 1)
+            if once | placed != full:
+                return None  # Some digit has no place left in this unit
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for i, j in unit:
+                    if candidates[i][j] & bit:  # Gone already if an earlier single of this unit took the cell
+                        if not place(i, j, bit):
+                            return None
+                        changed = True
+                        break
+        if changed or not locked:
+            continue
+        for shared, line, rest in sudoku_intersections(size):  # Locked candidates
+            inside = outside_line = outside_box = 0
+            for i, j in shared:
+                inside |= candidates[i][j]
+            for i, j in line:
+                outside_line |= candidates[i][j]
+            for i, j in rest:
+                outside_box |= candidates[i][j]
+            pointing = inside & outside_line & ~outside_box
+            claiming = inside & outside_box & ~outside_line
+            if pointing or claiming:
+                if not (strike(line, pointing) and strike(rest, claiming)):
+                    return None
+                changed = True
+    return grid, candidates
+
+
+class NodeLimit(Exception):
+    """Raised by exact_cover when its budget of guesses runs out."""
+
+
+def exact_cover(columns, rows, partial, budget=None, locked=None, order=None):
+    """Algorithm X: yield every set of rows covering each column exactly once, starting from partial.
+
+    A column with a single row left is always taken first. When there is none the search has to guess: on the
+    column with the fewest rows, or with order on the column of order with the fewest rows (ties go to the first
+    one in order, which keeps the search in one place instead of following the columns that cover and uncover
+    shuffle around). With locked, the box size, strike_locked prunes the matrix before every guess. budget, a
+    one-item list, is the number of guesses left; NodeLimit is raised when it runs out.
+    """
+    if not columns:
+        yield list(partial)
+        return
+    fewest = min(columns.values(), key=len)
+    if len(fewest) > 1:
+        if locked:
+            struck = strike_locked(columns, rows, locked)
+            if struck:  # Choose again on the smaller matrix
+                yield from exact_cover(columns, rows, partial, budget, locked, order)
+                restore(columns, rows, struck)
+                return
+        if order:
+            fewest = min((columns[c] for c in order if c in columns), key=len, default=fewest)
+        if budget is not None:
+            budget[0] -= 1
+            if budget[0] < 0:
+                raise NodeLimit
+    for row in list(fewest):
+        partial.append(row)
+        removed = cover(columns, rows, row)
+        yield from exact_cover(columns, rows, partial, budget, locked, order)
+        uncover(columns, rows, row, removed)
+        partial.pop()
+
+
+def cover(columns, rows, row):
+    """Remove the columns that row satisfies, and every other row clashing with it."""
+    removed = []
+    for c in rows[row]:
+        for other in columns[c]:
+            for c2 in rows[other]:
+                if c2 != c:
+                    columns[c2].remove(other)
+        removed.append(columns.pop(c))
+    return removed
+
+
+def uncover(columns, rows, row, removed):
+    """Undo cover, in reverse order, so the search can try the next row."""
+    for c in reversed(rows[row]):
+        columns[c] = removed.pop()
+        for other in columns[c]:
+            for c2 in rows[other]:
+                if c2 != c:
+                    columns[c2].add(other)
+
+
+def strike_locked(columns, rows, box):
+    """Locked candidates on the exact-cover matrix. Every row is (cell, row digit, column digit, box digit); when
+    all rows left in one digit column share a second digit column (a box digit confined to one row of the box,
+    or a row digit to one box), the second column's other rows can never be chosen. Removes them from every
+    column they are in and returns them for restore. Only columns of at most box rows can fit in one place where
+    a box meets a line."""
+    struck = []
+    for column, live in columns.items():
+        if column[0] == 'cell' or not 0 < len(live) <= box:
+            continue
+        for k in (1, 2, 3):
+            shared = None
+            for row in live:
+                if shared is None:
+                    shared = rows[row][k]
+                elif rows[row][k] != shared:
+                    break
+            else:
+                if shared != column:
+                    for row in columns[shared] - live:
+                        for c in rows[row]:
+                            columns[c].discard(row)
+                        struck.append(row)
+    return struck
+
+
+def restore(columns, rows, struck):
+    """Undo strike_locked."""
+    for row in reversed(struck):
+        for c in rows[row]:
+            columns[c].add(row)
+
+
+def sudoku_cover(grid, candidates, rng=None):
+    """What is left of a reduced puzzle as exact cover: a row per empty cell and candidate digit, a column per
+    empty cell and per row, column and box digit still to be placed. The columns are made in a fixed order, which
+    rng shuffles if given; ties in the search go by that order."""
+    size = len(grid)
+    box = isqrt(size)
+    placed = {}
+    for i in range(size):
+        for j in range(size):
+            if grid[i][j]:
+                n = grid[i][j]
+                placed[('row', i, n)] = placed[('col', j, n)] = placed[('box', (i // box) * box + j // box, n)] = 1
+    keys = [('cell', i, j) for i in range(size) for j in range(size) if not grid[i][j]]
+    keys += [(kind, k, n) for kind in ('row', 'col', 'box') for k in range(size) for n in range(1, size + 1)
+             if (kind, k, n) not in placed]
+    if rng:
+        rng.shuffle(keys)
+    columns = {c: set() for c in keys}  # A column left without rows makes the search fail there, as it should
+    rows = {}
+    for i in range(size):
+        for j in range(size):
+            mask = candidates[i][j]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                n = bit.bit_length()
+                row = (i, j, n)
+                rows[row] = [('cell', i, j), ('row', i, n), ('col', j, n), ('box', (i // box) * box + j // box, n)]
+                for c in rows[row]:
+                    columns[c].add(row)
+    return columns, rows
+
+
+def constraint_solutions(grid, budget=None, rng=None):
+    """Yield every solution of the puzzle: reduce first, exact cover for whatever is left. Taking forced columns
+    first fills naked singles (a cell column) and hidden singles (a digit column) at every node of the search,
+    and locked candidates are struck before every guess; guesses are made on cells. budget and rng are passed
+    on to exact_cover and sudoku_cover."""
+    reduced = reduce(grid)
+    if reduced is None:
+        return
+    grid, candidates = reduced
+    if is_goal(grid):
+        yield grid
+        return
+    columns, rows = sudoku_cover(grid, candidates, rng)
+    order = [c for c in columns if c[0] == 'cell']
+    for chosen in exact_cover(columns, rows, [], budget, isqrt(len(grid)), order):
+        solution = [row[:] for row in grid]
+        for i, j, n in chosen:
+            solution[i][j] = n
+        yield solution
+
+
+@instrumented
+def restarted_solutions(grid, limit=1, seed=0, timeout=None, stats=None):
+    """Up to limit solutions of the puzzle, searched with restarts.
+
+    One early wrong choice can hide the solutions under a huge subtree, and which choice that is depends on how
+    ties are broken. Every run therefore gets twice the guesses of the one before and a freshly shuffled column
+    order, so an unlucky order costs one short run instead of the whole solve. A run that ends within its budget
+    has searched the whole tree, so fewer than limit solutions then means there are no more.
+
+    With a timeout (in seconds) TimeoutError is raised when it has passed. It is only checked between runs, so
+    a solve can take up to about twice as long. stats counts the guesses as expanded and the runs as iterations.
+    """
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    rng = random.Random(seed)
+    guesses = len(grid) ** 2
+    shuffle = None  # The first run keeps the columns in the order sudoku_cover makes them
+    while True:
+        found = []
+        budget = [guesses]
+        try:
+            for solution in constraint_solutions(grid, budget, shuffle):
+                found.append(solution)
+                if len(found) == limit:
+                    break
+            return found
+        except NodeLimit:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"no answer after {timeout} s")
+        finally:
+            if stats:
+                stats.iterations += 1
+                stats.expanded += guesses - max(budget[0], 0)
+        guesses *= 2
+        shuffle = rng
+
+
+def solve_with_constraints(grid, timeout=None, stats=None):
+    """Solve a puzzle quickly, even the hardest 9x9 ones. Returns the solved grid, or None if there is none.
+    Raises TimeoutError if timeout seconds pass first (see restarted_solutions)."""
+    found = restarted_solutions(grid, timeout=timeout, stats=stats)
+    return found[0] if found else None
+
+def random_solution(box, rng=random):
+    """A random solved grid with box x box boxes: a valid pattern grid, shuffled in ways that keep it valid."""
+    size = box * box
+    def shuffled(n):
+        return rng.sample(range(n), n)
+    rows = [b * box + r for b in shuffled(box) for r in shuffled(box)]  # Bands, then rows within each band
+    cols = [s * box + c for s in shuffled(box) for c in shuffled(box)]  # Stacks, then columns within each stack
+    digits = [d + 1 for d in shuffled(size)]
+    return [[digits[(box * (r % box) + r // box + c) % size] for c in cols] for r in rows]
+
+if __name__ == "__main__":
+    # Our starting point, the unsolved Sudoku puzzle in a list of lists.
+    grid = [
+        [5, 3, 0, 0, 7, 0, 0, 0, 0],
+        [6, 0, 0, 1, 9, 5, 0, 0, 0],
+        [0, 9, 8, 0, 0, 0, 0, 6, 0],
+        [8, 0, 0, 0, 6, 0, 0, 0, 3],
+        [4, 0, 0, 8, 0, 3, 0, 0, 1],
+        [7, 0, 0, 0, 2, 0, 0, 0, 6],
+        [0, 6, 0, 0, 0, 0, 2, 8, 0],
+        [0, 0, 0, 4, 1, 9, 0, 0, 5],
+        [0, 0, 0, 0, 8, 0, 0, 0, 0]
+    ]
+
+    # Time to set off on our Sudoku-solving adventure using A* search and our chosen heuristic.
+    solution = a_star_search(grid, heuristic)  # solve_with_constraints(grid) is the fast way
+
+    # Did we make it to the treasure? Let's find out.
+    if solution == "FAILURE: NO PATH FOUND":
+        print("Uh-oh, no solution found. Keep exploring!")
+    else:
+        for row in solution[-1]:
+            print(row)
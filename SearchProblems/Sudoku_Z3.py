@@ -0,0 +1,112 @@
+# Sudoku solved by the Z3 SMT solver, as an alternative backend to the search in Sudoku.py.
+#
+# The rules of a size x size grid are added to one Solver once. Each puzzle only pushes its clues, checks and pops
+# them again, so Z3 keeps what it learned about the rules between puzzles. Two encodings are available:
+#
+#   onehot    one Boolean per cell and digit, exactly one true per cell and per digit in every unit
+#   distinct  one integer per cell, Distinct over every row, column and box
+#
+# The one-hot encoding is the default: it is pure SAT for Z3, while the integer one goes through arithmetic and
+# is one to two orders of magnitude slower. A time limit per check bounds the worst case: a puzzle that takes
+# longer raises TimeoutError instead of stalling the batch, while a puzzle without a solution comes back as None
+# like in Sudoku.py. Z3 is optional (pip install z3-solver), the rest of SearchProblems runs without it.
+#
+#   python Sudoku_Z3.py [puzzles per size] [onehot|distinct]
+
+import statistics
+import sys
+import time
+from functools import partial
+
+try:
+    from z3 import Bool, Distinct, Int, PbEq, Solver, sat, unsat
+except ImportError:  # Only needed when this backend is used
+    Solver = None
+
+from Sudoku import solve_with_constraints, sudoku_units
+
+
+class Z3Sudoku:
+    """A Z3 solver for size x size grids that is reused for every puzzle of that size."""
+
+    def __init__(self, size=9, encoding='onehot', timeout=None):
+        if Solver is None:
+            raise ImportError("the Z3 backend needs the z3-solver package")
+        self.size = size
+        self.encoding = encoding
+        self.solver = Solver()
+        if timeout is not None:
+            self.solver.set(timeout=int(timeout * 1000))  # Z3 counts in milliseconds
+        units = sudoku_units(size)
+        if encoding == 'distinct':
+            self.cells = [[Int(f"c_{i}_{j}") for j in range(size)] for i in range(size)]
+            for row in self.cells:
+                for cell in row:
+                    self.solver.add(1 <= cell, cell <= size)
+            for unit in units:
+                self.solver.add(Distinct([self.cells[i][j] for i, j in unit]))
+        elif encoding == 'onehot':
+            self.cells = [[[Bool(f"c_{i}_{j}_{n}") for n in range(1, size + 1)] for j in range(size)]
+                          for i in range(size)]
+            for row in self.cells:
+                for cell in row:
+                    self.solver.add(PbEq([(x, 1) for x in cell], 1))
+            for unit in units:
+                for n in range(size):
+                    self.solver.add(PbEq([(self.cells[i][j][n], 1) for i, j in unit], 1))
+        else:
+            raise ValueError(f"unknown encoding {encoding!r}")
+
+    def clue(self, i, j, n):
+        if self.encoding == 'distinct':
+            return self.cells[i][j] == n
+        return self.cells[i][j][n - 1]
+
+    def value(self, model, i, j):
+        if self.encoding == 'distinct':
+            return model.eval(self.cells[i][j]).as_long()
+        return next(n for n in range(1, self.size + 1) if model.eval(self.cells[i][j][n - 1]))
+
+    def solve(self, grid):
+        """The solved grid, or None if the puzzle has no solution. Raises TimeoutError if Z3 gave up first."""
+        self.solver.push()
+        try:
+            self.solver.add([self.clue(i, j, grid[i][j])
+                             for i in range(self.size) for j in range(self.size) if grid[i][j]])
+            result = self.solver.check()
+            if result == unsat:
+                return None
+            if result != sat:  # unknown: the time limit ran out (or Z3 gave up for another reason)
+                raise TimeoutError(f"Z3 returned unknown: {self.solver.reason_unknown()}")
+            model = self.solver.model()
+            return [[self.value(model, i, j) for j in range(self.size)] for i in range(self.size)]
+        finally:
+            self.solver.pop()
+
+
+def benchmark(count=20, seed=0, encoding='onehot', timeout=10):
+    """Throughput, median and worst solve time of the native solver and Z3 on the puzzle sets of
+    Sudoku_benchmark, with the same time limit per puzzle for both."""
+    from Sudoku_benchmark import is_solution, puzzle_sets  # Only the benchmark needs the generator and its pool
+    for set_name, box, puzzles in puzzle_sets(count, seed):
+        size = box * box
+        solvers = {'native': partial(solve_with_constraints, timeout=timeout),
+                   f'z3 {encoding}': Z3Sudoku(size, encoding, timeout).solve}
+        for name, solve in solvers.items():
+            times, timeouts = [], 0
+            for puzzle in puzzles:
+                began = time.perf_counter()
+                try:
+                    solution = solve(puzzle)
+                    assert solution and is_solution(solution, puzzle)  # Every puzzle here has a solution
+                except TimeoutError:
+                    timeouts += 1
+                times.append(time.perf_counter() - began)
+            print(f"{size}x{size} {set_name} {name}: {count} puzzles, {count / sum(times):.0f} puzzles/s, "
+                  f"median {statistics.median(times) * 1000:.1f} ms, max {max(times) * 1000:.1f} ms"
+                  + (f", {timeouts} timed out" if timeouts else ""))
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+              encoding=sys.argv[2] if len(sys.argv) > 2 else 'onehot')
@@ -0,0 +1,111 @@
+# Batch Sudoku solving across all cores.
+#
+# Puzzles are streamed from a file with one puzzle per line, written as size * size symbols: '1'-'9' then 'A'-'P'
+# for grids up to 25x25, '.' or '0' for an empty cell (the usual 81-character format for 9x9 collections).
+# Chunks of puzzles go to a process pool, solutions come back in input order and are written one per line
+# ("unsolvable" when there is none, "invalid" for a line that is not a puzzle, "timeout" when --timeout ran out
+# first), and a summary with puzzles/sec and latency percentiles goes to stderr. Without a timeout one puzzle
+# from the hard region of large random grids can hold up a worker, and the ordered output behind it, for hours.
+#
+#   python Sudoku_batch.py puzzles17.txt solutions.txt --workers 8 --chunk-size 256 --timeout 10
+
+import argparse
+import sys
+import time
+from functools import partial
+from math import isqrt
+from multiprocessing import Pool
+
+from Sudoku import solve_with_constraints
+
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+def parse_puzzle(line):
+    """Turn one line of the puzzle file into a grid (list of lists, 0 for empty).
+
+    Raises ValueError unless the line has box^4 symbols (81 for 9x9) and every symbol fits the grid size.
+    """
+    size = isqrt(len(line))
+    box = isqrt(size)
+    if size * size != len(line) or box * box != size or not 2 <= box <= 5:
+        raise ValueError(f"{len(line)} symbols is not a 9x9, 16x16 or 25x25 grid")
+    values = []
+    for ch in line:
+        n = 0 if ch in '.0' else SYMBOLS.find(ch.upper()) + 1
+        if not 0 <= n <= size or (n == 0 and ch not in '.0'):
+            raise ValueError(f"symbol {ch!r} does not fit a {size}x{size} grid")
+        values.append(n)
+    return [values[i * size:(i + 1) * size] for i in range(size)]
+
+
+def format_grid(grid):
+    return ''.join(SYMBOLS[n - 1] if n else '.' for row in grid for n in row)
+
+
+def read_puzzles(path):
+    """Stream the puzzles, skipping blank lines and '#' comments."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+def solve_line(line, timeout=None):
+    """Worker: solve one puzzle line, return the output line and the time it took.
+
+    A malformed line comes back as "invalid", so one bad line doesn't take down the rest of the batch, and a
+    puzzle that is not solved within timeout seconds as "timeout" (see solve_with_constraints for how exact).
+    """
+    began = time.perf_counter()
+    try:
+        grid = parse_puzzle(line)
+    except ValueError:
+        return "invalid", time.perf_counter() - began
+    try:
+        solution = solve_with_constraints(grid, timeout)
+    except TimeoutError:
+        return "timeout", time.perf_counter() - began
+    return (format_grid(solution) if solution else "unsolvable"), time.perf_counter() - began
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def solve_batch(puzzles, output, workers=None, chunk_size=64, timeout=None):
+    """Solve every puzzle on a process pool, write the solutions in order, return the per-puzzle latencies."""
+    latencies = []
+    with Pool(workers) as pool:
+        for line, seconds in pool.imap(partial(solve_line, timeout=timeout), puzzles, chunksize=chunk_size):
+            output.write(line + '\n')
+            latencies.append(seconds)
+    return latencies
+
+
+def report(latencies, elapsed, stream=sys.stderr):
+    ordered = sorted(latencies)
+    print(f"{len(ordered)} puzzles in {elapsed:.2f} s, {len(ordered) / elapsed:.1f} puzzles/sec", file=stream)
+    if ordered:
+        print("latency ms: " + ", ".join(f"p{p} {percentile(ordered, p) * 1000:.2f}" for p in (50, 90, 99)) +
+              f", max {ordered[-1] * 1000:.2f}", file=stream)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a file of Sudoku puzzles on a process pool")
+    parser.add_argument('puzzles', help="file with one puzzle per line")
+    parser.add_argument('output', nargs='?', help="file for the solutions (default: stdout)")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=64, help="puzzles handed to a worker at a time")
+    parser.add_argument('--timeout', type=float, default=None, help="seconds per puzzle (default: no limit)")
+    args = parser.parse_args()
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    began = time.perf_counter()
+    try:
+        latencies = solve_batch(read_puzzles(args.puzzles), output, args.workers, args.chunk_size, args.timeout)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    report(latencies, time.perf_counter() - began)
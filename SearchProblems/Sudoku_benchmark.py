@@ -0,0 +1,77 @@
+# Solve-time benchmark of the constraint solver for 9x9, 16x16 and 25x25 grids.
+#
+# Two kinds of puzzle sets, the same puzzles every run for a given seed:
+#
+#   unique  made by Sudoku_generator: clues are taken out only while the solution stays unique, which leaves about
+#           69% of a 9x9 grid and 63% of a 16x16 one empty, like published puzzles. Generating takes about 10 s
+#           per 16x16 puzzle; a 25x25 one takes longer than 20 minutes, so there is no such set for 25x25.
+#   random  a random solved grid with a fixed share of the cells emptied again. From about half empty on, 25x25
+#           grids are in the hard region of random puzzles: most solve in well under a second, a few need orders
+#           of magnitude more search. The shares below run through that region on purpose.
+#
+# Every solve gets a time limit (20 s by default). Solves that run out are counted and reported, not dropped, so
+# the tail shows in the results. Every solution is checked against its clues and the Sudoku rules.
+#
+#   python Sudoku_benchmark.py [puzzles per set] [seconds per puzzle]
+
+import random
+import statistics
+import sys
+import time
+
+from Sudoku import random_solution, solve_with_constraints
+from Sudoku_generator import generate
+
+SIZES = ((3, 0.6), (4, 0.6), (5, 0.5), (5, 0.55), (5, 0.6))  # Box size and share of empty cells, random sets
+UNIQUE = (3, 4)  # Box sizes of the generated sets
+
+
+def make_puzzle(box, empty, rng):
+    grid = random_solution(box, rng)
+    size = box * box
+    for cell in rng.sample(range(size * size), int(empty * size * size)):
+        grid[cell // size][cell % size] = 0
+    return grid
+
+
+def is_solution(solution, puzzle):
+    size = len(puzzle)
+    box = int(size ** 0.5)
+    digits = list(range(1, size + 1))
+    groups = ([row for row in solution] + [[row[j] for row in solution] for j in range(size)] +
+              [[solution[r + k // box][c + k % box] for k in range(size)]
+               for r in range(0, size, box) for c in range(0, size, box)])
+    return (all(sorted(group) == digits for group in groups) and
+            all(puzzle[i][j] in (0, solution[i][j]) for i in range(size) for j in range(size)))
+
+
+def puzzle_sets(count, seed=0):
+    """(name, box size, puzzles) for every set, each from its own random stream."""
+    for box in UNIQUE:
+        rng = random.Random(f"unique-{box}-{seed}")
+        yield "unique", box, [generate(box, rng=rng) for _ in range(count)]
+    for box, empty in SIZES:
+        rng = random.Random(f"random-{box}-{empty}-{seed}")
+        yield f"{int(empty * 100)}% empty", box, [make_puzzle(box, empty, rng) for _ in range(count)]
+
+
+def benchmark(count=20, seed=0, timeout=20):
+    for name, box, puzzles in puzzle_sets(count, seed):
+        times, timeouts = [], 0
+        for puzzle in puzzles:
+            began = time.perf_counter()
+            try:
+                solution = solve_with_constraints(puzzle, timeout)
+                assert solution and is_solution(solution, puzzle)
+            except TimeoutError:
+                timeouts += 1
+            times.append(time.perf_counter() - began)
+        size = box * box
+        print(f"{size}x{size} {name}: {count} puzzles, "
+              f"median {statistics.median(times) * 1000:.1f} ms, max {max(times) * 1000:.1f} ms, "
+              f"{timeouts} timed out after {timeout} s")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+              timeout=float(sys.argv[2]) if len(sys.argv) > 2 else 20)
@@ -0,0 +1,97 @@
+# Sudoku puzzle generator with a fast uniqueness check.
+#
+# A puzzle starts as a random solved grid. Clues are taken out one by one in random order, and a removal is kept
+# only if the puzzle still has exactly one solution. Counting stops at the second solution, and most checks never
+# get past the first node of the search because propagation alone already fills the grid. Difficulty bands are
+# measured by the simplest technique that solves the puzzle:
+#
+#   easy    naked singles (cells with one candidate left) solve the whole puzzle
+#   medium  hidden singles (digits with one place left in a unit) are needed as well
+#   hard    singles get stuck and search is needed
+#
+#   python Sudoku_generator.py 1000 --band hard --workers 8 > puzzles.txt
+
+import argparse
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from Sudoku import SudokuState, propagate, random_solution, restarted_solutions
+from Sudoku_batch import format_grid
+
+BANDS = ('easy', 'medium', 'hard')
+
+
+def count_solutions(grid, limit=2):
+    """Number of solutions of the puzzle, but never more than limit (2 is enough to tell unique from not)."""
+    return len(restarted_solutions(grid, limit))
+
+
+def naked_singles_solve(grid):
+    """True if filling cells that have only one candidate left is enough to finish the puzzle."""
+    state = SudokuState(grid)
+    while True:
+        cell = state.most_constrained_cell()
+        if cell is None:
+            return True
+        mask = state.candidates(*cell)
+        if mask == 0 or mask & (mask - 1):
+            return False  # Stuck: the best cell has no digit or more than one
+        state = state.fill(*cell, mask.bit_length())
+
+
+def difficulty(grid):
+    """The band of a puzzle: the simplest kind of single that solves it, or 'hard' if singles get stuck."""
+    if naked_singles_solve(grid):
+        return 'easy'
+    reduced = propagate(grid)
+    return 'medium' if reduced and all(all(row) for row in reduced) else 'hard'
+
+
+def generate(box=3, band=None, rng=random, attempts=50):
+    """A puzzle with exactly one solution, in the given band if one is asked for.
+
+    A removal is also undone when it would push the puzzle past the band, so digging stops at the band's upper
+    edge. A grid that ends up below the band is dropped and the next attempt starts from a fresh one.
+    """
+    size = box * box
+    for _ in range(attempts):
+        puzzle = random_solution(box, rng)
+        for cell in rng.sample(range(size * size), size * size):
+            i, j = divmod(cell, size)
+            digit, puzzle[i][j] = puzzle[i][j], 0
+            too_hard = band is not None and BANDS.index(difficulty(puzzle)) > BANDS.index(band)
+            if too_hard or count_solutions(puzzle) != 1:
+                puzzle[i][j] = digit  # This clue is needed
+        if band is None or difficulty(puzzle) == band:
+            return puzzle
+    return None
+
+
+def generate_line(job):
+    """Worker: one generated puzzle in the batch file format (None if no puzzle in the band was found)."""
+    box, band, seed = job
+    puzzle = generate(box, band, random.Random(seed))
+    return format_grid(puzzle) if puzzle else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate Sudoku puzzles with a unique solution")
+    parser.add_argument('count', type=int, help="number of puzzles")
+    parser.add_argument('--box', type=int, default=3, help="box size, 3 for 9x9, 4 for 16x16")
+    parser.add_argument('--band', choices=BANDS, default=None, help="difficulty band")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first puzzle, the next ones count up")
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    made = 0
+    jobs = ((args.box, args.band, args.seed + k) for k in range(args.count))
+    with Pool(args.workers) as pool:
+        for line in pool.imap(generate_line, jobs, chunksize=16):
+            if line:
+                print(line)
+                made += 1
+    elapsed = time.perf_counter() - began
+    print(f"{made} puzzles in {elapsed:.2f} s, {made / elapsed * 60:.0f} puzzles/min", file=sys.stderr)